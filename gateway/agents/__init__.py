@@ -1,14 +1,23 @@
 """Pydantic AI Agents for Quest App."""
 
-from .quest_agent import quest_agent, QuestContext
+from .quest_agent import QuestContext
+from .registry import quest_agent, get_app_agent, get_app_config, AppAgentConfig
 from .extractor import fact_extractor, ExtractedFact
+from .rule_extractor import extract_fact, extract_fact_by_rules
 from .summarizer import summarizer_agent, ConversationSummary
+from .summary_pipeline import summarize_transcript
 
 __all__ = [
     "quest_agent",
     "QuestContext",
+    "get_app_agent",
+    "get_app_config",
+    "AppAgentConfig",
     "fact_extractor",
     "ExtractedFact",
+    "extract_fact",
+    "extract_fact_by_rules",
     "summarizer_agent",
     "ConversationSummary",
+    "summarize_transcript",
 ]
@@ -0,0 +1,358 @@
+"""
+Agent Cassettes - Record/replay of agent runs for offline benchmarking
+
+Record mode wraps the model and the service clients (Zep, Neon,
+SuperMemory) of a real session and writes every model response and
+service call, with timings, to a JSON cassette per session.
+
+Replay mode feeds a cassette back through a FunctionModel and stub
+services, at recorded speed or accelerated (`speed`), so the chat and
+voice pipelines can be profiled deterministically without network.
+
+Controlled by AGENT_CASSETTE_MODE=record|replay and AGENT_CASSETTE_DIR.
+See evals/replay_bench.py for the offline benchmark.
+"""
+
+import asyncio
+import dataclasses
+import inspect
+import json
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, List, Optional
+
+from pydantic import BaseModel
+from pydantic_ai import Agent
+from pydantic_ai.messages import (
+    ModelMessage,
+    ModelMessagesTypeAdapter,
+    ModelResponse,
+    TextPart,
+    ToolCallPart,
+)
+from pydantic_ai.models import Model
+from pydantic_ai.models.function import AgentInfo, DeltaToolCall, FunctionModel
+from pydantic_ai.models.wrapper import WrapperModel
+
+from .quest_agent import QuestContext
+
+CASSETTE_MODE = os.getenv("AGENT_CASSETTE_MODE", "")  # "" | "record" | "replay"
+# Relative paths resolve against the gateway package, not the process cwd
+CASSETTE_DIR = Path(__file__).resolve().parent.parent / os.getenv("AGENT_CASSETTE_DIR", "cassettes")
+CASSETTE_SPEED = float(os.getenv("AGENT_CASSETTE_SPEED", "1.0"))
+
+# Services on QuestContext that are captured/stubbed
+SERVICE_FIELDS = ("zep_client", "neon_service", "supermemory_client")
+
+
+class CassetteExhausted(LookupError):
+    """Replay asked for more model responses or service calls than were recorded."""
+
+
+def _to_jsonable(value: Any) -> Any:
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return _to_jsonable(dataclasses.asdict(value))
+    if isinstance(value, dict):
+        return {str(k): _to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [_to_jsonable(v) for v in value]
+    if hasattr(value, "__dict__"):
+        return {k: _to_jsonable(v) for k, v in vars(value).items() if not k.startswith("_")}
+    return str(value)
+
+
+class _Record(dict):
+    """Replayed service result: a dict that also allows attribute access (r.content)."""
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+def _from_jsonable(value: Any) -> Any:
+    if isinstance(value, dict):
+        return _Record({k: _from_jsonable(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return [_from_jsonable(v) for v in value]
+    return value
+
+
+class Cassette:
+    """Recorded turns of one session: prompts, model responses and service calls."""
+
+    def __init__(
+        self,
+        session_id: str,
+        turns: Optional[List[dict]] = None,
+        app_id: Optional[str] = None,
+        agent_name: Optional[str] = None,
+    ):
+        self.session_id = session_id
+        self.turns: List[dict] = turns or []
+        # Which app agent recorded it, so replay rebuilds the same prompt and tools
+        self.app_id = app_id
+        self.agent_name = agent_name
+        self._models: Deque[dict] = deque()
+        self._services: Dict[str, Deque[dict]] = {}
+        self._index()
+
+    @classmethod
+    def path_for(cls, session_id: str, directory: Path = CASSETTE_DIR) -> Path:
+        return directory / f"{session_id}.json"
+
+    @classmethod
+    def load(cls, path: Path) -> "Cassette":
+        data = json.loads(Path(path).read_text())
+        return cls(data["session_id"], data["turns"], data.get("app_id"), data.get("agent_name"))
+
+    def save(self, directory: Path = CASSETTE_DIR) -> Path:
+        directory.mkdir(parents=True, exist_ok=True)
+        path = self.path_for(self.session_id, directory)
+        path.write_text(json.dumps({
+            "session_id": self.session_id,
+            "app_id": self.app_id,
+            "agent_name": self.agent_name,
+            "turns": self.turns,
+        }, indent=1))
+        return path
+
+    def _index(self) -> None:
+        """Build replay queues: model responses in order, service calls per method path."""
+        for turn in self.turns:
+            for item in turn["interactions"]:
+                if item["kind"] == "model":
+                    self._models.append(item)
+                else:
+                    self._services.setdefault(item["call"], deque()).append(item)
+
+    # --- Recording -------------------------------------------------------
+
+    def start_turn(self, prompt: str, services: List[str]) -> List[dict]:
+        turn = {"prompt": prompt, "services": services, "interactions": []}
+        self.turns.append(turn)
+        return turn["interactions"]
+
+    @property
+    def exhausted(self) -> bool:
+        """Every recorded model response has been replayed."""
+        return not self._models
+
+    @property
+    def services(self) -> List[str]:
+        """Services that were connected while recording (others stay None on replay)."""
+        return sorted({name for turn in self.turns for name in turn.get("services", [])})
+
+    def recording_model(self, model: Model | str, interactions: List[dict]) -> "RecordingModel":
+        return RecordingModel(model, interactions)
+
+    def record_service(self, name: str, service: Any, interactions: List[dict]) -> "RecordingProxy":
+        return RecordingProxy(service, name, interactions)
+
+    # --- Replay ----------------------------------------------------------
+
+    def replay_model(self, speed: float = CASSETTE_SPEED) -> FunctionModel:
+        """
+        FunctionModel that returns the recorded responses in order.
+
+        `speed` scales recorded latencies: 1.0 is real time, 10 is ten
+        times faster, 0 replays with no delay at all.
+        """
+
+        def next_response() -> dict:
+            if not self._models:
+                raise CassetteExhausted(f"No recorded model responses left in {self.session_id}")
+            return self._models.popleft()
+
+        def decode(item: dict) -> ModelResponse:
+            return ModelMessagesTypeAdapter.validate_python(item["response"])[0]
+
+        async def respond(messages: List[ModelMessage], info: AgentInfo) -> ModelResponse:
+            item = next_response()
+            await _delay(item["duration"], speed)
+            return decode(item)
+
+        async def stream(messages: List[ModelMessage], info: AgentInfo) -> AsyncIterator:
+            item = next_response()
+            response = decode(item)
+            chunks: List[Any] = []
+            for index, part in enumerate(response.parts):
+                if isinstance(part, TextPart):
+                    words = part.content.split(" ")
+                    chunks.extend(w + " " for w in words[:-1])
+                    chunks.append(words[-1])
+                elif isinstance(part, ToolCallPart):
+                    chunks.append({index: DeltaToolCall(
+                        name=part.tool_name,
+                        json_args=part.args_as_json_str(),
+                        tool_call_id=part.tool_call_id,
+                    )})
+            per_chunk = item["duration"] / max(len(chunks), 1)
+            for chunk in chunks:
+                await _delay(per_chunk, speed)
+                yield chunk
+
+        return FunctionModel(respond, stream_function=stream, model_name="cassette")
+
+    def replay_service(self, name: str, speed: float = CASSETTE_SPEED) -> "ReplayProxy":
+        return ReplayProxy(self, name, speed)
+
+    def next_service_call(self, call: str) -> dict:
+        queue = self._services.get(call)
+        if not queue:
+            raise CassetteExhausted(f"No recorded calls to {call} left in {self.session_id}")
+        return queue.popleft()
+
+
+async def _delay(duration: float, speed: float) -> None:
+    if speed > 0 and duration > 0:
+        await asyncio.sleep(duration / speed)
+
+
+class RecordingModel(WrapperModel):
+    """Passes requests through to the real model and records responses and timings."""
+
+    def __init__(self, wrapped: Model | str, interactions: List[dict]):
+        super().__init__(wrapped)
+        self.interactions = interactions
+
+    def _record(self, response: ModelResponse, duration: float) -> None:
+        self.interactions.append({
+            "kind": "model",
+            "duration": round(duration, 4),
+            "response": ModelMessagesTypeAdapter.dump_python([response], mode="json"),
+        })
+
+    async def request(self, messages, model_settings, model_request_parameters) -> ModelResponse:
+        start = time.perf_counter()
+        response = await self.wrapped.request(messages, model_settings, model_request_parameters)
+        self._record(response, time.perf_counter() - start)
+        return response
+
+    @asynccontextmanager
+    async def request_stream(self, messages, model_settings, model_request_parameters, *args, **kwargs):
+        start = time.perf_counter()
+        async with self.wrapped.request_stream(
+            messages, model_settings, model_request_parameters, *args, **kwargs
+        ) as streamed:
+            yield streamed
+        self._record(streamed.get(), time.perf_counter() - start)
+
+
+class RecordingProxy:
+    """Wraps a service client; async method calls are recorded with their results."""
+
+    def __init__(self, target: Any, path: str, interactions: List[dict]):
+        self._target = target
+        self._path = path
+        self._interactions = interactions
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._target, name)
+        path = f"{self._path}.{name}"
+
+        if inspect.iscoroutinefunction(attr):
+            async def recorded(*args, **kwargs):
+                start = time.perf_counter()
+                entry = {"kind": "service", "call": path, "args": _to_jsonable([args, kwargs])}
+                try:
+                    result = await attr(*args, **kwargs)
+                    entry["result"] = _to_jsonable(result)
+                    return result
+                except Exception as e:
+                    entry["error"] = f"{type(e).__name__}: {e}"
+                    raise
+                finally:
+                    entry["duration"] = round(time.perf_counter() - start, 4)
+                    self._interactions.append(entry)
+
+            return recorded
+
+        if callable(attr) or isinstance(attr, (str, int, float, bool, type(None))):
+            return attr
+        # Nested client namespaces such as zep_client.graph
+        return RecordingProxy(attr, path, self._interactions)
+
+
+class ReplayProxy:
+    """Stub service that answers calls from the cassette, in recorded order per method."""
+
+    def __init__(self, cassette: Cassette, path: str, speed: float):
+        self._cassette = cassette
+        self._path = path
+        self._speed = speed
+
+    def __getattr__(self, name: str) -> "ReplayProxy":
+        return ReplayProxy(self._cassette, f"{self._path}.{name}", self._speed)
+
+    async def __call__(self, *args, **kwargs) -> Any:
+        item = self._cassette.next_service_call(self._path)
+        await _delay(item["duration"], self._speed)
+        if "error" in item:
+            raise RuntimeError(item["error"])
+        return _from_jsonable(item.get("result"))
+
+
+# Replay cassettes stay loaded so consecutive turns continue where they left off;
+# dropped once fully replayed, and capped in case sessions stop midway
+_replaying: Dict[str, Cassette] = {}
+MAX_REPLAYING = 256
+
+
+@contextmanager
+def cassette_session(
+    agent: Agent,
+    deps: QuestContext,
+    prompt: str,
+    model: Model | str | None = None,
+) -> Iterator[QuestContext]:
+    """
+    Wrap one agent turn in record or replay mode (no-op when disabled).
+
+    Yields the deps to pass to the agent run: services wrapped for
+    recording, or replaced by stubs for replay. `model` is the model the
+    turn was routed to (None = the agent's own); the override replaces
+    the per-run model, so recording has to wrap that one.
+    """
+    if CASSETTE_MODE == "record":
+        path = Cassette.path_for(deps.session_id)
+        cassette = Cassette.load(path) if path.exists() else Cassette(deps.session_id)
+        cassette.app_id, cassette.agent_name = deps.app_id, agent.name
+        connected = [name for name in SERVICE_FIELDS if getattr(deps, name) is not None]
+        interactions = cassette.start_turn(prompt, connected)
+        services = {
+            name: cassette.record_service(name, getattr(deps, name), interactions)
+            for name in connected
+        }
+        model = cassette.recording_model(model or agent.model, interactions)
+        try:
+            with agent.override(model=model):
+                yield deps.model_copy(update=services)
+        finally:
+            cassette.save()
+
+    elif CASSETTE_MODE == "replay":
+        cassette = _replaying.get(deps.session_id)
+        if cassette is None:
+            cassette = Cassette.load(Cassette.path_for(deps.session_id))
+            while len(_replaying) >= MAX_REPLAYING:
+                _replaying.pop(next(iter(_replaying)))  # Oldest session
+            _replaying[deps.session_id] = cassette
+        services = {name: cassette.replay_service(name) for name in cassette.services}
+        try:
+            with agent.override(model=cassette.replay_model()):
+                yield deps.model_copy(update=services)
+        finally:
+            if cassette.exhausted:
+                _replaying.pop(deps.session_id, None)  # The recorded session is over
+
+    else:
+        yield deps
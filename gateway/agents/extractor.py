@@ -3,6 +3,7 @@ Fact Extractor Agent - Background extraction
 
 Runs in parallel with the main Talker agent.
 Uses Claude Haiku for fast structured output (~400ms).
+Call through rule_extractor.extract_fact so simple facts skip the LLM.
 """
 
 from typing import Literal
@@ -3,13 +3,14 @@ Quest Agent - Main Talker (user-facing)
 
 This is the primary agent for handling user conversations.
 Uses Gemini Flash for fast responses (~500ms).
+
+The agent itself is built by agents/registry.py, which gives each app
+its own prompt and tool subset; this module holds the shared context
+and the relocation prompt.
 """
 
-from typing import Any, Optional, Literal
+from typing import Any, Dict, Optional, Literal, Tuple
 from pydantic import BaseModel, Field
-from pydantic_ai import Agent
-
-from utils.llm_config import MODELS
 
 
 class QuestContext(BaseModel):
@@ -18,12 +19,16 @@ class QuestContext(BaseModel):
     app_id: str = "relocation"  # "relocation" | "insurance" | "dashboard"
     user_id: Optional[str] = None
     session_id: str
+    knowledge_graph: Optional[str] = None  # Zep graph for search_knowledge
 
     # Service references (injected at runtime)
     zep_client: Optional[Any] = None
     neon_service: Optional[Any] = None
     supermemory_client: Optional[Any] = None
 
+    # Run bookkeeping: (run_id, run_step) -> when its first tool call started (tool_executor)
+    tool_steps: Dict[Tuple[Optional[str], int], float] = Field(default_factory=dict, exclude=True)
+
     class Config:
         arbitrary_types_allowed = True
 
@@ -36,11 +41,8 @@ class FactConflictResolution(BaseModel):
     merged_value: Optional[str] = None
 
 
-# Main user-facing agent
-quest_agent = Agent(
-    MODELS["talker"],
-    deps_type=QuestContext,
-    system_prompt="""You are the Quest assistant helping users with international relocation.
+# Relocation prompt; AVAILABLE TOOLS is appended per app from its tool subset
+QUEST_SYSTEM_PROMPT = """You are the Quest assistant helping users with international relocation.
 
 EXTRACTION RULES:
 - Extract facts naturally mentioned in conversation
@@ -60,13 +62,4 @@ RESPONSE RULES:
 - Be conversational, not formal
 - Use thinking phrases: "Let me check...", "Good question..."
 - Reference our articles when relevant
-
-AVAILABLE TOOLS:
-- search_knowledge: Search articles and knowledge base
-- get_user_profile: Get current user preferences
-- get_personalization: Get personalized context from memory
-- extract_and_store_fact: Store extracted facts (background)
-- update_primary_preference: Update destination/origin (requires confirmation)
-- suggest_similar_destinations: Find similar countries
 """
-)
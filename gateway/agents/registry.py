@@ -0,0 +1,123 @@
+"""
+App Agent Registry - One configured agent per app_id
+
+Each app ("relocation", "insurance", "dashboard") gets its own prompt,
+tool subset, model tier and Zep knowledge graph. Agents are built once
+on first use and reused for every request, and smaller apps only carry
+the tool schemas and prompt text they actually need.
+"""
+
+import dataclasses
+import json
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+from pydantic_ai import Agent
+
+from utils.llm_config import MODELS
+from .quest_agent import QuestContext, QUEST_SYSTEM_PROMPT
+from .tools import TOOLS
+
+
+class AppAgentConfig(BaseModel):
+    """Agent configuration for one app."""
+
+    app_id: str
+    system_prompt: str
+    tools: List[str]  # Names from agents.tools.TOOLS
+    model_tier: str = "talker"  # Key into utils.llm_config.MODELS
+    knowledge_graph: Optional[str] = None  # Zep graph_id for search_knowledge
+
+    @property
+    def full_system_prompt(self) -> str:
+        """The app prompt plus the tool list appended to it."""
+        tool_list = "\n".join(f"- {name}: {TOOL_SUMMARIES[name]}" for name in self.tools)
+        return f"{self.system_prompt}\nAVAILABLE TOOLS:\n{tool_list}\n"
+
+    def prompt_parts(self) -> List[str]:
+        """What the model receives besides the user message: system prompt and tool schemas."""
+        definitions = [dataclasses.asdict(TOOLS[name].tool_def) for name in self.tools]
+        return [self.full_system_prompt, json.dumps(definitions)]
+
+
+# One-line tool descriptions appended to each app's prompt
+TOOL_SUMMARIES = {
+    "search_knowledge": "Search articles and knowledge base",
+    "get_user_profile": "Get current user preferences",
+    "get_personalization": "Get personalized context from memory",
+    "extract_and_store_fact": "Store extracted facts (background)",
+    "update_primary_preference": "Update destination/origin (requires confirmation)",
+    "suggest_similar_destinations": "Find similar countries",
+}
+
+INSURANCE_SYSTEM_PROMPT = """You are the Quest assistant helping users with international health and travel insurance.
+
+RESPONSE RULES:
+- Keep voice responses under 100 words
+- Be conversational, not formal
+- Explain coverage in plain language; never guarantee a policy outcome
+- Reference our articles when relevant
+"""
+
+DASHBOARD_SYSTEM_PROMPT = """You are the Quest assistant on the user's relocation dashboard.
+
+Help the user understand their saved profile, progress and next steps.
+
+RESPONSE RULES:
+- Be brief and specific to what is on their profile
+- Be conversational, not formal
+- Reference our articles when relevant
+"""
+
+APP_CONFIGS: Dict[str, AppAgentConfig] = {
+    "relocation": AppAgentConfig(
+        app_id="relocation",
+        system_prompt=QUEST_SYSTEM_PROMPT,
+        tools=list(TOOLS),
+        knowledge_graph="relocation_knowledge",
+    ),
+    "insurance": AppAgentConfig(
+        app_id="insurance",
+        system_prompt=INSURANCE_SYSTEM_PROMPT,
+        tools=["search_knowledge", "get_user_profile", "get_personalization"],
+        knowledge_graph="insurance_knowledge",
+    ),
+    "dashboard": AppAgentConfig(
+        app_id="dashboard",
+        system_prompt=DASHBOARD_SYSTEM_PROMPT,
+        tools=["get_user_profile", "get_personalization", "search_knowledge"],
+        knowledge_graph="relocation_knowledge",
+    ),
+}
+
+DEFAULT_APP_ID = "relocation"
+
+_agents: Dict[str, Agent[QuestContext, str]] = {}
+
+
+def get_app_config(app_id: Optional[str]) -> AppAgentConfig:
+    """Config for `app_id`, falling back to relocation for unknown apps."""
+    return APP_CONFIGS.get(app_id or DEFAULT_APP_ID, APP_CONFIGS[DEFAULT_APP_ID])
+
+
+def build_app_agent(config: AppAgentConfig) -> Agent[QuestContext, str]:
+    return Agent(
+        MODELS[config.model_tier],
+        deps_type=QuestContext,
+        tools=[TOOLS[name] for name in config.tools],
+        system_prompt=config.full_system_prompt,
+        name=f"{config.app_id}_agent",
+    )
+
+
+def get_app_agent(app_id: Optional[str]) -> Agent[QuestContext, str]:
+    """The agent for `app_id`, built once and cached."""
+    config = get_app_config(app_id)
+    agent = _agents.get(config.app_id)
+    if agent is None:
+        agent = _agents[config.app_id] = build_app_agent(config)
+    return agent
+
+
+# Main user-facing agent (relocation), kept for existing callers
+quest_agent = get_app_agent(DEFAULT_APP_ID)
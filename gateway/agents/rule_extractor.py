@@ -0,0 +1,406 @@
+"""
+Rule Extractor - Gazetteer + pattern rules in front of fact_extractor
+
+Most facts are simple patterns over a closed vocabulary ("I'm from
+London", "move to Cyprus", "3k a month"). A compiled Aho-Corasick
+automaton finds every gazetteer place and cue phrase in one pass, and a
+handful of regex rules cover children, budget, timeline, visa type,
+family and work type. Runs in microseconds; the Haiku extractor is only called for
+messages the rules can't classify.
+
+Confidence values are calibrated against evals/fact_extraction.jsonl.
+"""
+
+import re
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from .extractor import ExtractedFact, fact_extractor
+
+
+class AhoCorasick:
+    """Multi-pattern matcher over lowercase text with word-boundary checks."""
+
+    def __init__(self, patterns: Dict[str, Tuple[str, str]]):
+        # Node 0 is the root; each node has goto edges, a fail link and outputs
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, str, str]]] = [[]]
+
+        for pattern, payload in patterns.items():
+            node = 0
+            for char in pattern.lower():
+                nxt = self._goto[node].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append((len(pattern), *payload))
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0) if node else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def find(self, text: str) -> List[Tuple[int, int, str, str]]:
+        """Return (start, end, kind, value) for whole-word matches, left to right."""
+        text = text.lower()
+        matches = []
+        node = 0
+        for i, char in enumerate(text):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            for length, kind, value in self._out[node]:
+                start = i - length + 1
+                end = i + 1
+                if (start == 0 or not text[start - 1].isalnum()) and (
+                    end == len(text) or not text[end].isalnum()
+                ):
+                    matches.append((start, end, kind, value))
+        matches.sort(key=lambda m: (m[0], -(m[1] - m[0])))
+        return matches
+
+
+# Closed vocabulary of places users talk about (lowercase alias -> canonical)
+COUNTRIES = [
+    "Australia", "Austria", "Belgium", "Brazil", "Bulgaria", "Canada", "Chile",
+    "Colombia", "Costa Rica", "Croatia", "Cyprus", "Czech Republic", "Denmark",
+    "Estonia", "Finland", "France", "Georgia", "Germany", "Greece", "Hungary",
+    "Indonesia", "Ireland", "Israel", "Italy", "Japan", "Malaysia", "Malta",
+    "Mexico", "Montenegro", "Morocco", "Netherlands", "New Zealand", "Norway",
+    "Panama", "Philippines", "Poland", "Portugal", "Romania", "Serbia",
+    "Singapore", "Slovenia", "South Africa", "South Korea", "Spain", "Sweden",
+    "Switzerland", "Thailand", "Turkey", "United Arab Emirates", "United Kingdom",
+    "United States", "Uruguay", "Vietnam",
+]
+CITIES = [
+    "Amsterdam", "Athens", "Bangkok", "Barcelona", "Berlin", "Lisbon", "Porto",
+    "Madrid", "Valencia", "Malaga", "Paris", "Rome", "Milan", "Dublin",
+    "Edinburgh", "Manchester", "London", "Limassol", "Larnaca", "Nicosia",
+    "Paphos", "Dubai", "Abu Dhabi", "Singapore", "Tokyo", "Sydney", "Melbourne",
+    "Toronto", "Vancouver", "New York", "San Francisco", "Los Angeles",
+    "Mexico City", "Medellin", "Buenos Aires", "Tbilisi", "Tallinn", "Prague",
+    "Budapest", "Vienna", "Zurich", "Munich", "Copenhagen", "Stockholm", "Oslo",
+    "Chiang Mai", "Bali", "Kuala Lumpur", "Valletta", "Split", "Sofia",
+]
+ALIASES = {
+    "uk": "United Kingdom", "britain": "United Kingdom", "england": "United Kingdom",
+    "usa": "United States", "america": "United States",
+    "the states": "United States", "uae": "United Arab Emirates",
+    "holland": "Netherlands", "the netherlands": "Netherlands", "nyc": "New York",
+}
+
+# Cue phrases that decide whether a nearby place is an origin or a destination.
+# The value is the base confidence for that phrasing.
+ORIGIN_CUES = {
+    "i'm from": 0.95, "i am from": 0.95, "im from": 0.9, "we're from": 0.95,
+    "we are from": 0.95, "i live in": 0.9, "we live in": 0.9, "based in": 0.85,
+    "currently in": 0.85, "currently living in": 0.9, "grew up in": 0.85,
+    "moving from": 0.9, "relocating from": 0.9, "leave": 0.7, "leaving": 0.75,
+}
+DESTINATION_CUES = {
+    "move to": 0.9, "moving to": 0.9, "relocate to": 0.9, "relocating to": 0.9,
+    "emigrate to": 0.9, "go to": 0.75, "settle in": 0.85, "live in": 0.8,
+    "thinking about": 0.7, "considering": 0.7, "interested in": 0.7,
+    "looking at": 0.7, "dreaming of": 0.65, "retire to": 0.85, "retire in": 0.85,
+}
+# Gazetteer entries that are also everyday words ("we can split costs"):
+# they only count as places when the user capitalized them
+AMBIGUOUS_PLACES = {"split", "turkey", "chile"}
+# Names shared with a US state: the rules can't tell which one is meant
+HOMONYM_PLACES = {"georgia"}
+HEDGES = ("maybe", "might", "perhaps", "not sure", "possibly", "or")
+
+
+def _build_matcher() -> AhoCorasick:
+    patterns: Dict[str, Tuple[str, str]] = {}
+    for place in COUNTRIES + CITIES:
+        patterns[place.lower()] = ("place", place)
+    for alias, place in ALIASES.items():
+        patterns[alias] = ("place", place)
+    for cue in ORIGIN_CUES:
+        patterns[cue] = ("origin_cue", cue)
+    for cue in DESTINATION_CUES:
+        # Origin cues win when both match the same span ("i live in")
+        patterns.setdefault(cue, ("destination_cue", cue))
+    return AhoCorasick(patterns)
+
+
+_matcher = _build_matcher()
+
+# Max characters between a cue phrase and the place it governs
+CUE_WINDOW = 25
+# "moving from London to Lisbon", "leaving Dublin for Malta": the second place
+# is the destination even though the last cue was an origin cue
+_SWITCH_RE = re.compile(r"\s+(?:to|for)\s+(?:the\s+)?")
+FROM_TO_CONFIDENCE = 0.85
+_NEGATION_RE = re.compile(
+    r"\b(?:don't|do not|doesn't|does not|not|never|no longer|won't|wouldn't|can't|cannot)\b(?! sure)"
+)
+# "go to Paris for a conference" is a trip, not a move (nor its date a timeline)
+_TRIP_RE = re.compile(
+    r"\s*\b(?:for|on)\s+(?:a|an|the|my|our|some)?\s*(?:\w+\s+)?"
+    r"(?:conference|trip|holidays?|vacation|weekend|visit|wedding|meeting|weeks?|few days)\b"
+)
+
+_NUMBER_WORDS = {
+    "no": 0, "zero": 0, "one": 1, "a": 1, "two": 2, "three": 3, "four": 4,
+    "five": 5, "six": 6,
+}
+_CHILDREN_RE = re.compile(
+    r"\b(?:(?P<cue>have|has|had|got|with|our|expecting)\s+)?"
+    r"(?P<count>\d+|no|zero|one|a|two|three|four|five|six)\s+(?:young\s+|little\s+)?"
+    r"(?P<noun>kids?|children|child|sons?|daughters?|babies|baby)\b"
+)
+# Amounts the user earns rather than spends
+_INCOME_RE = re.compile(r"\b(earn|earning|make|making|salary|income|paid|take home|gross|net)\b")
+_BUDGET_RE = re.compile(
+    r"(?P<cur>[$£€])?\s?(?P<amount>\d{1,3}(?:,\d{3})+|\d+(?:\.\d+)?)\s?(?P<k>k|thousand)?\s?"
+    r"(?P<cur2>euros?|eur|pounds?|gbp|dollars?|usd)?\s?"
+    r"(?:a|per|/|each)\s?(?P<period>month|mo|year|yr)\b"
+)
+_MONTHS = (
+    "january|february|march|april|may|june|july|august|september|october|"
+    "november|december"
+)
+_TIMELINE_RE = re.compile(
+    rf"\b(?P<prep>by|in|before|around|from|this|next|early|late|end of)\s+"
+    rf"(?P<when>(?:{_MONTHS})(?:\s+\d{{4}})?|year|next year|the summer|"
+    rf"summer|winter|spring|autumn|\d{{4}}|\d+\s+months?|a few months|six months)\b"
+)
+# Prepositions that are part of the timeline itself ("next year", "early March")
+_TIMELINE_QUALIFIERS = ("this", "next", "early", "late", "end of")
+# Clauses whose dates aren't a moving timeline: questions ("rent in Lisbon in
+# June?") and past events ("I went to Paris in 2019")
+_QUESTION_START_RE = re.compile(
+    r"^\s*(what|what's|how|which|is|are|can|could|should|would|does|do)\b"
+)
+_PAST_RE = re.compile(
+    r"\b(went|was|were|visited|lived|moved|spent|stayed|did|travell?ed|used to|ago)\b"
+)
+_CLAUSE_BREAK_RE = re.compile(r"[.!?;\n]")
+_FAMILY_RULES = [
+    (re.compile(r"\b(my|our)\s+(wife|husband|spouse)\b"), "married", 0.9),
+    (re.compile(r"\b(i'm|i am|we're|we are)\s+married\b"), "married", 0.95),
+    (re.compile(r"\b(my|our)\s+(partner|girlfriend|boyfriend|fianc[eé]e?)\b"), "partner", 0.85),
+    (re.compile(r"\b(i'm|i am)\s+single\b"), "single", 0.9),
+    (re.compile(r"\b(just me|on my own|by myself)\b"), "single", 0.75),
+]
+_WORK_TYPE_RULES = [
+    (re.compile(r"\b(work|working)\s+(fully\s+)?remote(ly)?\b|\bremote (worker|job)\b|\bdigital nomad\b(?! visa)|\bwork from (home|anywhere)\b"), "remote", 0.9),
+    (re.compile(r"\bhybrid\b"), "hybrid", 0.8),
+    (re.compile(r"\b(on-?site|in the office|in-office)\b"), "on-site", 0.8),
+]
+
+_VISA_RE = re.compile(
+    r"\b(golden|digital nomad|nomad|d7|d8|non-lucrative|startup|retirement|"
+    r"skilled worker|work|student|investor|family reunification)\s+visa\b"
+)
+
+# Order in which facts are preferred when a message holds several
+FACT_PRIORITY = [
+    "destination", "origin", "children", "budget", "timeline", "visa_interest",
+    "family", "work_type",
+]
+
+
+def _hedged(text: str, start: int, end: int) -> bool:
+    window = text[max(0, start - 30):end + 30]
+    return any(re.search(rf"\b{h}\b", window) for h in HEDGES)
+
+
+def _clause(text: str, start: int, end: int) -> str:
+    """The sentence around a match, keeping its closing punctuation."""
+    before = [m.end() for m in _CLAUSE_BREAK_RE.finditer(text, 0, start)]
+    after = _CLAUSE_BREAK_RE.search(text, end)
+    return text[before[-1] if before else 0:after.end() if after else len(text)]
+
+
+def _is_place(message: str, start: int, alias: str) -> bool:
+    return alias not in AMBIGUOUS_PLACES or message[start:start + 1].isupper()
+
+
+def _negated(text: str, cue_start: int) -> bool:
+    """A negation shortly before the cue, in the same clause ("I don't want to move to")."""
+    window = re.split(r"[.!?;,]", text[max(0, cue_start - 25):cue_start])[-1]
+    return bool(_NEGATION_RE.search(window))
+
+
+def _extract_places(text: str, message: str) -> Optional[List[ExtractedFact]]:
+    """Cue-governed places; None when the rules can't tell what the user meant."""
+    facts = []
+    last_cue: Optional[Tuple[int, int, str, str]] = None  # (start, end, kind, cue)
+    origin_end: Optional[int] = None  # End of the last place read as an origin
+    consumed_until = -1
+
+    for start, end, kind, value in _matcher.find(text):
+        if start < consumed_until:
+            continue  # Overlaps a longer match we already took
+        consumed_until = end
+
+        if kind in ("origin_cue", "destination_cue"):
+            last_cue = (start, end, kind, value)
+            origin_end = None
+            continue
+        if not _is_place(message, start, text[start:end]) or last_cue is None:
+            continue
+
+        cue_start, cue_end, cue_kind, cue = last_cue
+        if origin_end is not None and _SWITCH_RE.fullmatch(text[origin_end:start]):
+            fact_type, confidence = "destination", FROM_TO_CONFIDENCE
+            reasoning = f'rule: "{cue}" place, then to/for + gazetteer place'
+        elif start - cue_end <= CUE_WINDOW:
+            fact_type = "origin" if cue_kind == "origin_cue" else "destination"
+            confidence = (ORIGIN_CUES if fact_type == "origin" else DESTINATION_CUES)[cue]
+            reasoning = f'rule: "{cue}" + gazetteer place'
+        else:
+            continue
+
+        if text[start:end] in HOMONYM_PLACES or _negated(text, cue_start):
+            return None
+        if _TRIP_RE.match(text[end:end + 40]):
+            continue
+        if _hedged(text, cue_end, end):
+            confidence -= 0.15
+        origin_end = end if fact_type == "origin" else None
+        facts.append(ExtractedFact(
+            fact_type=fact_type,
+            value=value,
+            confidence=round(confidence, 2),
+            reasoning=reasoning,
+        ))
+
+    origins = {f.value for f in facts if f.fact_type == "origin"}
+    if any(f.fact_type == "destination" and f.value in origins for f in facts):
+        return None  # The same place read both ways
+    return facts
+
+
+def _extract_patterns(text: str) -> List[ExtractedFact]:
+    facts = []
+
+    counts = []
+    for match in _CHILDREN_RE.finditer(text):
+        raw = match.group("count")
+        if raw == "a" and not match.group("cue"):
+            continue  # "I am a child psychologist": "a" needs "have a", "with a", ...
+        counts.append((int(raw) if raw.isdigit() else _NUMBER_WORDS[raw], raw, match.group("noun")))
+    gendered = all(noun.startswith(("son", "daughter")) for _, _, noun in counts)
+    # "2 sons and 1 daughter" adds up; "2 kids, 1 son" may not, so leave it to the LLM
+    if len(counts) == 1 or (counts and gendered):
+        facts.append(ExtractedFact(
+            fact_type="children",
+            value=str(sum(count for count, _, _ in counts)),
+            confidence=0.8 if any(raw == "a" for _, raw, _ in counts) else 0.9,
+            reasoning="rule: children count",
+        ))
+
+    for match in _BUDGET_RE.finditer(text):
+        if not (match.group("cur") or match.group("cur2") or match.group("k") or "budget" in text):
+            continue
+        if _INCOME_RE.search(text[max(0, match.start() - 25):match.start()]):
+            continue  # "I earn 5k a month" is income, not a budget
+        amount = float(match.group("amount").replace(",", ""))
+        if match.group("k"):
+            amount *= 1000
+        period = "month" if match.group("period") in ("month", "mo") else "year"
+        if match.group("cur"):
+            value = f"{match.group('cur')}{int(amount)}/{period}"
+        elif match.group("cur2"):
+            value = f"{int(amount)} {match.group('cur2')}/{period}"
+        else:
+            value = f"{int(amount)}/{period}"
+        facts.append(ExtractedFact(
+            fact_type="budget",
+            value=value,
+            confidence=0.85,
+            reasoning="rule: amount per period",
+        ))
+        break
+
+    for match in _TIMELINE_RE.finditer(text):
+        clause = _clause(text, match.start(), match.end())
+        if (
+            clause.rstrip().endswith("?") or _QUESTION_START_RE.match(clause)
+            or _PAST_RE.search(clause) or _TRIP_RE.search(clause)
+        ):
+            continue
+        when = match.group("when")
+        if match.group("prep") in _TIMELINE_QUALIFIERS:
+            when = f"{match.group('prep')} {when}"
+        facts.append(ExtractedFact(
+            fact_type="timeline",
+            value=when if when[0].isdigit() else when.title(),
+            confidence=0.7 if _hedged(text, match.start(), match.end()) else 0.85,
+            reasoning="rule: timeline phrase",
+        ))
+        break
+
+    match = _VISA_RE.search(text)
+    if match:
+        facts.append(ExtractedFact(
+            fact_type="visa_interest",
+            value=match.group(0),
+            confidence=0.85,
+            reasoning="rule: named visa type",
+        ))
+
+    for rules, fact_type in ((_FAMILY_RULES, "family"), (_WORK_TYPE_RULES, "work_type")):
+        for pattern, value, confidence in rules:
+            if pattern.search(text):
+                facts.append(ExtractedFact(
+                    fact_type=fact_type,
+                    value=value,
+                    confidence=confidence,
+                    reasoning=f"rule: {fact_type} phrase",
+                ))
+                break
+
+    return facts
+
+
+def find_places(message: str) -> List[str]:
+    """Canonical gazetteer places mentioned anywhere in the message."""
+    text = message.lower().replace("’", "'")
+    places = [
+        value for start, end, kind, value in _matcher.find(text)
+        if kind == "place" and _is_place(message, start, text[start:end])
+    ]
+    return list(dict.fromkeys(places))
+
+
+def extract_all_facts(message: str) -> List[ExtractedFact]:
+    """Every fact the rules can find, most significant first (none if ambiguous)."""
+    text = message.lower().replace("’", "'")
+    places = _extract_places(text, message)
+    if places is None:
+        return []  # Negated, homonym or contradictory places: the LLM decides
+    facts = places + _extract_patterns(text)
+    facts.sort(key=lambda f: (FACT_PRIORITY.index(f.fact_type), -f.confidence))
+    return facts
+
+
+def extract_fact_by_rules(message: str) -> Optional[ExtractedFact]:
+    """The most significant rule-extracted fact, or None if rules can't classify."""
+    facts = extract_all_facts(message)
+    return facts[0] if facts else None
+
+
+async def extract_fact(message: str) -> Optional[ExtractedFact]:
+    """Rules first; fall back to the LLM extractor only when they find nothing."""
+    fact = extract_fact_by_rules(message)
+    if fact is not None:
+        return fact
+
+    result = await fact_extractor.run(message)
+    return result.output
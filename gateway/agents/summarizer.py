@@ -3,6 +3,8 @@ Summarizer Agent - Background conversation compression
 
 Runs when conversations get long (>30 messages).
 Generates titles and summaries for dashboard display.
+Transcripts too long for one prompt go through summarize_transcript
+(agents/summary_pipeline.py), which map-reduces over this agent.
 """
 
 from typing import List
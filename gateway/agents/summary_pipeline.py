@@ -0,0 +1,213 @@
+"""
+Summary Pipeline - Hierarchical map-reduce summarization of long transcripts
+
+summarizer_agent takes a whole conversation in one prompt, which fails
+(or gets expensive) for multi-hour voice sessions. This pipeline:
+
+- reads the transcript as a stream and cuts it into chunks of about
+  `chunk_tokens` tokens (local estimate, see token_budget.count_tokens)
+- summarizes chunks concurrently, at most `concurrency` model calls in
+  flight; the stream is not read further ahead than that
+- reduces every `fan_in` consecutive partial summaries into one, level by
+  level, so only O(fan_in * log(n)) summaries are ever held
+- merges key_facts_mentioned and topics_discussed locally (ordered,
+  normalized dedup) rather than trusting the model to carry them over
+
+Peak memory is bounded by concurrency, chunk size and fan-in, not by
+transcript length. Benchmark: evals/summarize_bench.py.
+"""
+
+import asyncio
+import os
+import re
+from typing import AsyncIterable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from .summarizer import ConversationSummary, summarizer_agent
+from .token_budget import count_tokens
+
+CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "3000"))
+CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "4"))
+FAN_IN = 4
+# Merged lists stay bounded too; the earliest mentions are kept
+MAX_FACTS = 40
+MAX_TOPICS = 20
+
+_NORMALIZE_RE = re.compile(r"[^a-z0-9]+")
+
+Messages = Union[Iterable[dict], AsyncIterable[dict]]
+
+
+def _dedupe(groups: Iterable[List[str]], limit: int) -> List[str]:
+    """Ordered union; "Budget: 3,000" and "budget 3000" count as the same item."""
+    seen: Set[str] = set()
+    merged: List[str] = []
+    for items in groups:
+        for item in items:
+            key = _NORMALIZE_RE.sub("", item.lower())
+            if key and key not in seen:
+                seen.add(key)
+                merged.append(item.strip())
+                if len(merged) >= limit:
+                    return merged
+    return merged
+
+
+def merge_facts_and_topics(parts: List[ConversationSummary]) -> Tuple[List[str], List[str]]:
+    return (
+        _dedupe((p.key_facts_mentioned for p in parts), MAX_FACTS),
+        _dedupe((p.topics_discussed for p in parts), MAX_TOPICS),
+    )
+
+
+async def _iterate(messages: Messages):
+    if hasattr(messages, "__aiter__"):
+        async for message in messages:
+            yield message
+    else:
+        for message in messages:
+            yield message
+
+
+async def chunk_transcript(messages: Messages, chunk_tokens: int = CHUNK_TOKENS):
+    """Group transcript messages into formatted chunks of about `chunk_tokens` tokens."""
+    lines: List[str] = []
+    used = 0
+    async for message in _iterate(messages):
+        line = f"{message.get('role', 'user')}: {message.get('content', '')}"
+        cost = count_tokens(line)
+        if lines and used + cost > chunk_tokens:
+            yield "\n".join(lines)
+            lines, used = [], 0
+        lines.append(line)
+        used += cost
+    if lines:
+        yield "\n".join(lines)
+
+
+class SummaryPipeline:
+    """One streaming map-reduce run over a transcript."""
+
+    def __init__(
+        self,
+        chunk_tokens: int = CHUNK_TOKENS,
+        concurrency: int = CONCURRENCY,
+        fan_in: int = FAN_IN,
+    ):
+        self.chunk_tokens = chunk_tokens
+        self.fan_in = fan_in
+        self._slots = asyncio.Semaphore(concurrency)
+        self.concurrency = concurrency
+        # levels[n] holds finished summaries at depth n by position, until a
+        # run of `fan_in` consecutive ones can be reduced into level n + 1
+        self._levels: List[Dict[int, ConversationSummary]] = []
+        self._next_group: List[int] = []
+        self._tasks: Set[asyncio.Task] = set()
+        self._error: Optional[BaseException] = None
+
+        self.chunks = 0
+        self.model_calls = 0
+        self.peak_held = 0  # Most summaries held at once, across all levels
+
+    async def _call(self, prompt: str) -> ConversationSummary:
+        async with self._slots:
+            self.model_calls += 1
+            result = await summarizer_agent.run(prompt)
+            return result.output
+
+    async def _map(self, position: int, chunk: str) -> None:
+        summary = await self._call(
+            f"Summarize part {position + 1} of a longer conversation:\n\n{chunk}"
+        )
+        self._add(0, position, summary)
+
+    async def _reduce(self, level: int, position: int, parts: List[ConversationSummary]) -> None:
+        self._add(level, position, await self._merge(parts))
+
+    async def _merge(self, parts: List[ConversationSummary]) -> ConversationSummary:
+        facts, topics = merge_facts_and_topics(parts)
+        sections = "\n\n".join(
+            f"Part {i + 1}: {p.title}\n{p.summary}" for i, p in enumerate(parts)
+        )
+        merged = await self._call(
+            "These are summaries of consecutive parts of one conversation, in order. "
+            "Merge them into a single summary; later parts override earlier ones "
+            f"when the user changed their mind.\n\n{sections}\n\n"
+            f"Facts mentioned: {facts}\nTopics: {topics}"
+        )
+        return merged.model_copy(update={"key_facts_mentioned": facts, "topics_discussed": topics})
+
+    def _add(self, level: int, position: int, summary: ConversationSummary) -> None:
+        while len(self._levels) <= level:
+            self._levels.append({})
+            self._next_group.append(0)
+        held = self._levels[level]
+        held[position] = summary
+        self.peak_held = max(self.peak_held, sum(len(items) for items in self._levels))
+
+        start = self._next_group[level] * self.fan_in
+        group = range(start, start + self.fan_in)
+        if all(i in held for i in group):
+            parts = [held.pop(i) for i in group]
+            self._spawn(self._reduce(level + 1, self._next_group[level], parts))
+            self._next_group[level] += 1
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._settle)
+
+    def _settle(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        # A lost chunk would leave a gap in its level, so the first error fails the run
+        if not task.cancelled() and task.exception() is not None and self._error is None:
+            self._error = task.exception()
+
+    async def _drain(self, keep_below: int) -> None:
+        while len(self._tasks) > keep_below and self._error is None:
+            await asyncio.wait(self._tasks, return_when=asyncio.FIRST_COMPLETED)
+        if self._error is not None:
+            raise self._error
+
+    async def run(self, messages: Messages) -> Optional[ConversationSummary]:
+        try:
+            async for chunk in chunk_transcript(messages, self.chunk_tokens):
+                # Backpressure: don't read ahead of what can be summarized
+                await self._drain(keep_below=self.concurrency)
+                self._spawn(self._map(self.chunks, chunk))
+                self.chunks += 1
+            await self._drain(keep_below=0)
+        except BaseException:
+            for task in self._tasks:
+                task.cancel()
+            raise
+
+        # Leftover partial groups: higher levels cover earlier parts of the transcript
+        remaining = [
+            held[i]
+            for held in reversed(self._levels)
+            for i in sorted(held)
+        ]
+        while len(remaining) > 1:
+            groups = [remaining[i:i + self.fan_in] for i in range(0, len(remaining), self.fan_in)]
+            remaining = list(await asyncio.gather(*(
+                self._merge(group) if len(group) > 1 else asyncio.sleep(0, group[0])
+                for group in groups
+            )))
+        return remaining[0] if remaining else None
+
+    def stats(self) -> dict:
+        return {
+            "chunks": self.chunks,
+            "model_calls": self.model_calls,
+            "levels": len(self._levels),
+            "peak_summaries_held": self.peak_held,
+        }
+
+
+async def summarize_transcript(
+    messages: Messages,
+    chunk_tokens: int = CHUNK_TOKENS,
+    concurrency: int = CONCURRENCY,
+) -> Optional[ConversationSummary]:
+    """Summarize a transcript of any length; None if it has no messages."""
+    return await SummaryPipeline(chunk_tokens, concurrency).run(messages)
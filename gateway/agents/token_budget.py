@@ -0,0 +1,235 @@
+"""
+Token Budget - Per-turn token accounting and tool-result compaction
+
+Tool outputs are fed back to the model every round, so an unbounded
+search result inflates input tokens for every follow-up generation.
+This module:
+
+- counts prompt and tool-result tokens locally (fast estimate, no API)
+- keeps each tool's output within a per-tool budget, keeping the most
+  relevant lines first (term overlap with the tool's query argument)
+- drops lines already returned by an earlier tool call in the same turn
+- reports per-turn token usage under "tokens" on /health/metrics
+
+Tools opt in with the @budgeted decorator (see agents/tools.py); routers
+open a turn with `token_accounting(...)`.
+"""
+
+import functools
+import inspect
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Set
+
+from utils.metrics import LatencyWindow, register_metrics
+
+# Max tokens each tool may feed back to the model per call
+TOOL_BUDGETS: Dict[str, int] = {
+    "search_knowledge": 400,
+    "get_user_profile": 200,
+    "get_personalization": 250,
+    "suggest_similar_destinations": 150,
+}
+DEFAULT_TOOL_BUDGET = 300
+# A single line (e.g. one search hit) never takes more than this share of the budget
+MAX_LINE_SHARE = 0.5
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+# "Found 5 results:" headers whose count must follow deduplication
+_COUNT_HEADER_RE = re.compile(r"^(Found )(\d+)( results?)", re.IGNORECASE)
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def count_tokens(text: str) -> int:
+    """
+    Local token estimate: words and punctuation, with long words split.
+
+    Within ~10-15% of BPE tokenizers on English prose, which is enough
+    for budgeting and trend metrics.
+    """
+    return sum(1 + len(piece) // 8 for piece in _TOKEN_RE.findall(text))
+
+
+def _truncate_to_tokens(text: str, budget: int) -> str:
+    used = 0
+    for match in _TOKEN_RE.finditer(text):
+        cost = 1 + len(match.group()) // 8
+        if used + cost > budget:
+            return text[:match.start()].rstrip() + " …"
+        used += cost
+    return text
+
+
+class TurnLedger:
+    """Token accounting for one conversation turn."""
+
+    def __init__(self, prompt_tokens: int = 0):
+        self.prompt_tokens = prompt_tokens
+        self.tool_tokens_raw = 0
+        self.tool_tokens_sent = 0
+        self.tool_calls = 0
+        self.deduplicated_lines = 0
+        self.model_input_tokens: Optional[int] = None
+        self.model_output_tokens: Optional[int] = None
+        self._seen_lines: Set[str] = set()
+
+    def compact(self, tool_name: str, output: str, query: Optional[str] = None) -> str:
+        """Fit a tool's output into its budget: dedupe, rank by relevance, truncate."""
+        budget = TOOL_BUDGETS.get(tool_name, DEFAULT_TOOL_BUDGET)
+        self.tool_calls += 1
+        self.tool_tokens_raw += count_tokens(output)
+
+        lines = output.splitlines()
+        if len(lines) > 1:
+            header, items = lines[0], [line for line in lines[1:] if line.strip()]
+        else:
+            header, items = "", lines
+
+        # Drop lines already sent earlier this turn, or repeated within this output
+        fresh = []
+        seen_here: Set[str] = set()
+        for line in items:
+            key = line.strip().lower()
+            if key in self._seen_lines or key in seen_here:
+                self.deduplicated_lines += 1
+                continue
+            seen_here.add(key)
+            fresh.append(line)
+
+        if header and len(fresh) != len(items) and _COUNT_HEADER_RE.match(header):
+            # Count what is left after dedup; "(+N more omitted)" covers the budget cut.
+            # With nothing new, the header would only mislead.
+            header = _COUNT_HEADER_RE.sub(
+                lambda m: f"{m.group(1)}{len(fresh)}{m.group(3)}", header
+            ) if fresh else ""
+
+        if query:
+            terms = set(_WORD_RE.findall(query.lower()))
+            # Stable sort: ties keep the upstream (already relevance-ranked) order
+            fresh.sort(key=lambda line: -len(terms & set(_WORD_RE.findall(line.lower()))))
+
+        kept: List[str] = []
+        used = count_tokens(header)
+        line_cap = max(1, int(budget * MAX_LINE_SHARE))
+        for line in fresh:
+            short = _truncate_to_tokens(line, line_cap)
+            cost = count_tokens(short)
+            if used + cost > budget:
+                break
+            kept.append(short)
+            used += cost
+            self._seen_lines.add(line.strip().lower())
+
+        dropped = len(fresh) - len(kept)
+        if items and not kept:
+            body = ["(no new information beyond earlier results)" if not fresh else "(truncated)"]
+        else:
+            body = kept + ([f"(+{dropped} more omitted)"] if dropped else [])
+
+        compacted = "\n".join(([header] if header else []) + body)
+        self.tool_tokens_sent += count_tokens(compacted)
+        return compacted
+
+    def record_usage(self, usage: Any) -> None:
+        """Store model-reported usage (pass `result.usage`; its shape varies across pydantic-ai versions)."""
+        if callable(usage):
+            usage = usage()
+        self.model_input_tokens = getattr(usage, "input_tokens", None) or getattr(usage, "request_tokens", None)
+        self.model_output_tokens = getattr(usage, "output_tokens", None) or getattr(usage, "response_tokens", None)
+
+    def summary(self) -> dict:
+        return {
+            "prompt_tokens": self.prompt_tokens,
+            "tool_tokens_raw": self.tool_tokens_raw,
+            "tool_tokens_sent": self.tool_tokens_sent,
+            "tool_calls": self.tool_calls,
+            "deduplicated_lines": self.deduplicated_lines,
+            "model_input_tokens": self.model_input_tokens,
+            "model_output_tokens": self.model_output_tokens,
+        }
+
+
+_current_ledger: ContextVar[Optional[TurnLedger]] = ContextVar("turn_ledger", default=None)
+
+
+class TokenMeter:
+    """Aggregates finished turns for the metrics endpoint."""
+
+    def __init__(self):
+        self.turns = 0
+        self.tool_tokens_saved = 0
+        # Rolling windows of per-turn token counts
+        self.prompt = LatencyWindow()
+        self.tool_sent = LatencyWindow()
+        self.model_input = LatencyWindow()
+        self.model_output = LatencyWindow()
+
+    def finish(self, ledger: TurnLedger) -> None:
+        self.turns += 1
+        self.tool_tokens_saved += ledger.tool_tokens_raw - ledger.tool_tokens_sent
+        self.prompt.add(ledger.prompt_tokens)
+        self.tool_sent.add(ledger.tool_tokens_sent)
+        if ledger.model_input_tokens is not None:
+            self.model_input.add(ledger.model_input_tokens)
+        if ledger.model_output_tokens is not None:
+            self.model_output.add(ledger.model_output_tokens)
+
+    def metrics(self) -> dict:
+        def per_turn(window: LatencyWindow) -> dict:
+            return {
+                "p50": window.percentile(50),
+                "p95": window.percentile(95),
+                "max": window.percentile(100),
+            }
+
+        return {
+            "turns": self.turns,
+            "tool_tokens_saved": self.tool_tokens_saved,
+            "prompt_tokens_per_turn": per_turn(self.prompt),
+            "tool_tokens_per_turn": per_turn(self.tool_sent),
+            "model_input_tokens_per_turn": per_turn(self.model_input),
+            "model_output_tokens_per_turn": per_turn(self.model_output),
+        }
+
+
+token_meter = TokenMeter()
+register_metrics("tokens", token_meter.metrics)
+
+
+@contextmanager
+def token_accounting(*prompt_parts: str) -> Iterator[TurnLedger]:
+    """
+    Open a ledger for one turn; tool calls inside it are budgeted and counted.
+
+    `prompt_parts` is everything sent before the first tool call: the
+    agent's full system prompt, its tool definitions and the user message
+    (see AppAgentConfig.prompt_parts).
+    """
+    ledger = TurnLedger(prompt_tokens=sum(count_tokens(p) for p in prompt_parts if p))
+    token = _current_ledger.set(ledger)
+    try:
+        yield ledger
+    finally:
+        try:
+            _current_ledger.reset(token)
+        except ValueError:
+            pass  # Stream closed from another context (client disconnect)
+        token_meter.finish(ledger)
+
+
+def budgeted(func: Callable[..., Awaitable[str]]) -> Callable[..., Awaitable[str]]:
+    """Compact a tool's string output against the current turn's ledger."""
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs) -> str:
+        output = await func(*args, **kwargs)
+        ledger = _current_ledger.get()
+        if ledger is None or not isinstance(output, str):
+            return output
+        bound = signature.bind_partial(*args, **kwargs)
+        query = bound.arguments.get("query") or bound.arguments.get("destination")
+        return ledger.compact(func.__name__, output, query=query)
+
+    return wrapper
@@ -0,0 +1,137 @@
+"""
+Tool Executor - Deadlines, fallbacks and latency stats for agent tools
+
+Pydantic AI runs the tool calls of one model response concurrently.
+This layer keeps one slow upstream from holding the whole step:
+
+- each tool has its own timeout (TOOL_TIMEOUTS)
+- every tool in a step shares a step deadline (TOOL_STEP_DEADLINE_SECONDS)
+  measured from the first tool call of that step
+- on timeout or error the model gets a short degraded fallback string
+  instead of an exception, so it can still answer
+- writes are shielded: a timed-out write keeps running in the background
+  rather than being cancelled halfway
+
+Per-tool calls, latency percentiles, timeouts and errors appear under
+"tools" on /health/metrics.
+"""
+
+import asyncio
+import functools
+import os
+import time
+from typing import Awaitable, Callable, Dict
+
+from pydantic_ai import RunContext
+
+from utils.metrics import LatencyWindow, register_metrics
+
+# Seconds each tool may take before its fallback is used
+TOOL_TIMEOUTS: Dict[str, float] = {
+    "search_knowledge": 2.5,
+    "get_user_profile": 1.0,
+    "get_personalization": 1.5,
+    "suggest_similar_destinations": 2.0,
+    "extract_and_store_fact": 3.0,
+    "update_primary_preference": 3.0,
+}
+DEFAULT_TOOL_TIMEOUT = 2.0
+STEP_DEADLINE = float(os.getenv("TOOL_STEP_DEADLINE_SECONDS", "4"))
+
+# Writes are shielded from cancellation when they time out
+WRITE_TOOLS = {"extract_and_store_fact", "update_primary_preference"}
+
+FALLBACKS: Dict[str, str] = {
+    "search_knowledge": "Knowledge base is slow right now; answer from general knowledge and offer to check again.",
+    "get_user_profile": "Profile is temporarily unavailable; ask the user if you need a detail.",
+    "get_personalization": "No personalization available right now.",
+    "suggest_similar_destinations": "Similar destinations are unavailable right now.",
+    "extract_and_store_fact": "Saving is taking longer than usual; it will complete in the background.",
+    "update_primary_preference": "The update is still processing; tell the user it may take a moment to appear.",
+}
+
+
+class ToolStats:
+    """Per-tool counters and latency windows."""
+
+    def __init__(self):
+        self.calls: Dict[str, int] = {}
+        self.timeouts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.latency: Dict[str, LatencyWindow] = {}
+
+    def record(self, name: str, seconds: float, outcome: str) -> None:
+        self.calls[name] = self.calls.get(name, 0) + 1
+        if outcome == "timeout":
+            self.timeouts[name] = self.timeouts.get(name, 0) + 1
+        elif outcome == "error":
+            self.errors[name] = self.errors.get(name, 0) + 1
+        self.latency.setdefault(name, LatencyWindow()).add(seconds)
+
+    def metrics(self) -> dict:
+        return {
+            "step_deadline_s": STEP_DEADLINE,
+            "by_tool": {
+                name: {
+                    "calls": self.calls[name],
+                    "timeouts": self.timeouts.get(name, 0),
+                    "errors": self.errors.get(name, 0),
+                    "latency": self.latency[name].summary(),
+                }
+                for name in self.calls
+            },
+        }
+
+
+tool_stats = ToolStats()
+register_metrics("tools", tool_stats.metrics)
+
+
+def _time_left(ctx: RunContext, name: str) -> float:
+    """This tool's timeout, capped by what is left of the step deadline."""
+    steps = ctx.deps.tool_steps
+    now = time.monotonic()
+    # Deps may be reused across runs, so a step is only the same step within one run
+    key = (ctx.run_id, ctx.run_step)
+    if key not in steps:
+        for stale in [k for k, started in steps.items() if now - started > STEP_DEADLINE]:
+            del steps[stale]
+        steps[key] = now
+    step_started = steps[key]
+    remaining = STEP_DEADLINE - (now - step_started)
+    return max(0.0, min(TOOL_TIMEOUTS.get(name, DEFAULT_TOOL_TIMEOUT), remaining))
+
+
+def _consume_result(task: asyncio.Future) -> None:
+    # Background writes that outlived their timeout: don't leave errors unobserved
+    if not task.cancelled() and task.exception() is not None:
+        print(f"⚠️  Background tool write failed: {task.exception()}")
+
+
+def guarded(func: Callable[..., Awaitable[str]]) -> Callable[..., Awaitable[str]]:
+    """Run a tool under its deadline and degrade to a fallback string."""
+    name = func.__name__
+
+    @functools.wraps(func)
+    async def wrapper(ctx: RunContext, *args, **kwargs) -> str:
+        timeout = _time_left(ctx, name)
+        call = func(ctx, *args, **kwargs)
+        if name in WRITE_TOOLS:
+            write = asyncio.ensure_future(call)
+            write.add_done_callback(_consume_result)
+            call = asyncio.shield(write)
+
+        start = time.perf_counter()
+        outcome = "ok"
+        try:
+            return await asyncio.wait_for(call, timeout=timeout)
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            return FALLBACKS.get(name, f"{name} timed out; continue without it.")
+        except Exception as e:
+            outcome = "error"
+            return f"{name} unavailable: {e}"
+        finally:
+            tool_stats.record(name, time.perf_counter() - start, outcome)
+
+    return wrapper
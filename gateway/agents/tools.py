@@ -6,24 +6,49 @@ Tools for:
 - Neon user profile CRUD
 - SuperMemory personalization
 - Fact extraction and storage
+
+Tools are plain functions collected in TOOLS; each app agent registers
+only the subset it needs (see agents/registry.py). Every tool is
+@guarded (deadline + fallback, see agents/tool_executor.py) and read
+tools are @budgeted so their output fits a per-tool token budget.
+Knowledge search results are cached in shared state across workers.
 """
 
-from typing import Optional, Literal
+import hashlib
+import os
+from typing import Dict, Optional, Literal
 from pydantic import BaseModel, Field
-from pydantic_ai import RunContext
+from pydantic_ai import RunContext, Tool
 
-from .quest_agent import quest_agent, QuestContext, FactConflictResolution
+from .quest_agent import QuestContext, FactConflictResolution
 from .extractor import ExtractedFact
+from .token_budget import budgeted
+from .tool_executor import guarded
 from utils.llm_config import get_model
+from utils.event_hub import dashboard_hub
+from utils.profile_aggregator import profile_aggregator  # noqa: F401 - subscribes to fact events
+from utils.shared_state import shared_state
+
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "300"))
+
+
+def _search_cache_key(graph_id: str, query: str) -> str:
+    normalized = " ".join(query.lower().split())
+    return f"search:{graph_id}:" + hashlib.sha256(normalized.encode()).hexdigest()[:24]
 
 
-@quest_agent.tool
+@guarded
+@budgeted
 async def search_knowledge(ctx: RunContext[QuestContext], query: str) -> str:
     """Search Zep knowledge graph for relocation information."""
     if not ctx.deps.zep_client:
         return "Knowledge base unavailable"
 
-    graph_id = f"{ctx.deps.app_id}_knowledge"  # e.g., "relocation_knowledge"
+    graph_id = ctx.deps.knowledge_graph or f"{ctx.deps.app_id}_knowledge"
+    cache_key = _search_cache_key(graph_id, query)
+    cached = await shared_state.get_json(cache_key)
+    if cached is not None:
+        return cached
 
     try:
         results = await ctx.deps.zep_client.graph.search(
@@ -39,12 +64,15 @@ async def search_knowledge(ctx: RunContext[QuestContext], query: str) -> str:
         for r in results:
             formatted.append(f"- {r.content} (source: {r.metadata.get('source', 'unknown')})")
 
-        return f"Found {len(results)} results:\n" + "\n".join(formatted)
+        output = f"Found {len(results)} results:\n" + "\n".join(formatted)
+        await shared_state.set_json(cache_key, output, SEARCH_CACHE_TTL)
+        return output
     except Exception as e:
         return f"Search error: {str(e)}"
 
 
-@quest_agent.tool
+@guarded
+@budgeted
 async def get_user_profile(ctx: RunContext[QuestContext]) -> str:
     """Get current user profile facts from Neon."""
     if not ctx.deps.user_id or not ctx.deps.neon_service:
@@ -69,7 +97,8 @@ async def get_user_profile(ctx: RunContext[QuestContext]) -> str:
         return f"Profile error: {str(e)}"
 
 
-@quest_agent.tool
+@guarded
+@budgeted
 async def get_personalization(ctx: RunContext[QuestContext], query: str) -> str:
     """Get personalized context from SuperMemory."""
     if not ctx.deps.user_id or not ctx.deps.supermemory_client:
@@ -85,7 +114,7 @@ async def get_personalization(ctx: RunContext[QuestContext], query: str) -> str:
         return f"Personalization error: {str(e)}"
 
 
-@quest_agent.tool(require_approval=True)
+@guarded
 async def update_primary_preference(
     ctx: RunContext[QuestContext],
     preference_type: Literal["destination", "origin"],
@@ -118,6 +147,10 @@ async def update_primary_preference(
             confidence=1.0,  # User-confirmed = 100%
             source="user_verified",
         )
+        # The profile snapshot invalidates itself on this event
+        dashboard_hub.publish(ctx.deps.user_id, "fact_updated", {
+            "fact_type": preference_type, "value": new_value,
+        })
 
         return f"Updated {preference_type} to {new_value}" + (
             f" (previously: {previous_value})" if previous_value else ""
@@ -126,7 +159,16 @@ async def update_primary_preference(
         return f"Update error: {str(e)}"
 
 
-@quest_agent.tool
+def _fact_stored(
+    ctx: RunContext[QuestContext], fact_type: str, value: str, event: str = "fact_extracted"
+) -> None:
+    """After a fact write lands: tell open dashboards and the profile snapshot cache."""
+    dashboard_hub.publish(ctx.deps.user_id, event, {
+        "fact_type": fact_type, "value": value,
+    })
+
+
+@guarded
 async def extract_and_store_fact(
     ctx: RunContext[QuestContext],
     fact: ExtractedFact
@@ -157,6 +199,7 @@ async def extract_and_store_fact(
                     confidence=fact.confidence,
                     source="voice_llm"
                 )
+                _fact_stored(ctx, fact.fact_type, fact.value, "fact_updated")
                 return f"Updated {fact.fact_type}: {existing.fact_value} → {fact.value}"
 
             elif resolution.action == "merge":
@@ -166,6 +209,7 @@ async def extract_and_store_fact(
                     confidence=fact.confidence,
                     source="voice_llm"
                 )
+                _fact_stored(ctx, fact.fact_type, resolution.merged_value, "fact_updated")
                 return f"Merged {fact.fact_type}: {resolution.merged_value}"
 
             elif resolution.action == "keep_both":
@@ -176,6 +220,7 @@ async def extract_and_store_fact(
                     confidence=fact.confidence,
                     source="voice_llm"
                 )
+                _fact_stored(ctx, fact.fact_type, fact.value)
                 return f"Added additional {fact.fact_type}: {fact.value}"
 
             else:  # ignore
@@ -190,13 +235,15 @@ async def extract_and_store_fact(
                 confidence=fact.confidence,
                 source="voice_llm"
             )
+            _fact_stored(ctx, fact.fact_type, fact.value)
             return f"Stored new {fact.fact_type}: {fact.value}"
 
     except Exception as e:
         return f"Storage error: {str(e)}"
 
 
-@quest_agent.tool
+@guarded
+@budgeted
 async def suggest_similar_destinations(
     ctx: RunContext[QuestContext],
     destination: str
@@ -225,6 +272,17 @@ async def suggest_similar_destinations(
         return f"Similarity error: {str(e)}"
 
 
+TOOLS: Dict[str, Tool[QuestContext]] = {
+    "search_knowledge": Tool(search_knowledge, takes_ctx=True),
+    "get_user_profile": Tool(get_user_profile, takes_ctx=True),
+    "get_personalization": Tool(get_personalization, takes_ctx=True),
+    "extract_and_store_fact": Tool(extract_and_store_fact, takes_ctx=True),
+    # Confirmation happens in the conversation (see the prompt), not as a deferred call
+    "update_primary_preference": Tool(update_primary_preference, takes_ctx=True),
+    "suggest_similar_destinations": Tool(suggest_similar_destinations, takes_ctx=True),
+}
+
+
 async def resolve_fact_conflict(
     existing_value: str,
     new_value: str,
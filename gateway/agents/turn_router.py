@@ -0,0 +1,208 @@
+"""
+Turn Router - Pick a model tier per turn before calling the agent
+
+A local, microsecond classifier looks at the user message and the
+conversation state and routes each turn to:
+
+- fast: small talk and acknowledgements ("thanks!", "ok")
+- standard: normal questions, single lookups (the app agent's model)
+- reasoning: comparisons, multi-destination lookups, long multi-part turns
+
+Every decision is logged with its features and, once the turn
+finishes, its outcome (latency, tool calls, errors) so the thresholds
+below can be tuned from real traffic.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import time
+from typing import Dict, List, Literal, Optional
+
+import logfire
+from pydantic import BaseModel
+
+from utils.llm_config import MODELS
+from utils.metrics import LatencyWindow, register_metrics
+from .rule_extractor import extract_all_facts, find_places
+
+Tier = Literal["fast", "standard", "reasoning"]
+
+# MODELS key per tier; None keeps the app agent's own model (its model_tier)
+TIER_MODELS: Dict[str, Optional[str]] = {
+    "fast": "fast",
+    "standard": None,
+    "reasoning": "reasoning",
+}
+
+# Thresholds (tune from the routing log)
+FAST_MAX_WORDS = 6
+REASONING_MIN_WORDS = 40
+REASONING_MIN_PLACES = 2
+
+ROUTING_LOG_PATH = os.getenv("TURN_ROUTING_LOG")  # Optional JSONL of decisions + outcomes
+
+
+def _routing_log() -> Optional[logging.Logger]:
+    """JSONL logger whose file writes happen on a listener thread, not the event loop."""
+    if not ROUTING_LOG_PATH:
+        return None
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    file_handler = logging.FileHandler(ROUTING_LOG_PATH, delay=True)
+    file_handler.setFormatter(logging.Formatter("%(message)s"))
+    listener = logging.handlers.QueueListener(records, file_handler)
+    listener.start()
+    atexit.register(listener.stop)  # Flushes what is still queued
+
+    logger = logging.getLogger("quest.turn_routing")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    logger.addHandler(logging.handlers.QueueHandler(records))
+    return logger
+
+
+_routing_logger = _routing_log()
+
+_SMALL_TALK_RE = re.compile(
+    r"^\s*(hi|hello|hey|thanks|thank you|thx|cheers|ok|okay|cool|great|nice|"
+    r"perfect|awesome|got it|sounds good|bye|goodbye|see you|good morning|"
+    r"good night|lol|haha|sure|no worries)\b[\s!.,:)]*"
+    r"(so much|a lot|very much|again|there|mate)?[\s!.,:)]*$"
+)
+# Replies to a yes/no question; includes acknowledgements that would otherwise be small talk
+_CONFIRMATION_RE = re.compile(
+    r"^\s*(yes|yeah|yep|yup|ya|no|nope|nah|please do|go ahead|do it|sure|ok|okay|"
+    r"alright|all right|sounds good|perfect|great|absolutely|definitely|of course|"
+    r"correct|right|exactly|that's right|let's do it|why not|not really|not now)\b"
+)
+_COMPARISON_RE = re.compile(
+    r"\b(compare|comparison|versus|vs\.?|better|cheaper|difference|pros and cons|"
+    r"which (one|country|city)|trade-?offs?)\b"
+)
+_TOOL_HINT_RE = re.compile(
+    r"\b(visa|tax|taxes|cost|costs|price|rent|requirements?|documents?|apply|"
+    r"healthcare|insurance|schools?|article|my profile|remember|similar)\b"
+)
+
+
+class RouteDecision(BaseModel):
+    """Tier chosen for one turn and the features behind it."""
+
+    tier: Tier
+    reason: str
+    model: Optional[str]  # None = the agent's default model
+    features: Dict[str, object]
+    started_at: float = 0.0
+
+
+def turn_features(user_message: str, messages: Optional[List[dict]] = None) -> Dict[str, object]:
+    text = user_message.lower().strip()
+    last_assistant = next(
+        (m.get("content") for m in reversed(messages or []) if m.get("role") == "assistant"),
+        None,
+    )
+    return {
+        "words": len(text.split()),
+        # Original casing: ambiguous places (Split, Turkey) only count when capitalized
+        "places": len(find_places(user_message)),
+        "facts": len(extract_all_facts(user_message)),
+        "small_talk": bool(_SMALL_TALK_RE.match(text)),
+        "comparison": bool(_COMPARISON_RE.search(text)),
+        "tool_hint": bool(_TOOL_HINT_RE.search(text)),
+        "question": "?" in text,
+        "history": len(messages or []),
+        # "yes" to "Would you like to set X as your primary...?" needs a tool call
+        "answers_question": bool(
+            isinstance(last_assistant, str)
+            and last_assistant.rstrip().endswith("?")
+            and _CONFIRMATION_RE.match(text)
+        ),
+    }
+
+
+def classify(features: Dict[str, object]) -> tuple[Tier, str]:
+    if features["answers_question"]:
+        return "standard", "confirmation of a pending question"
+    if features["comparison"] and features["places"] >= 1:
+        return "reasoning", "comparison"
+    if features["places"] >= REASONING_MIN_PLACES and features["tool_hint"]:
+        return "reasoning", "multi-destination lookup"
+    if features["words"] >= REASONING_MIN_WORDS:
+        return "reasoning", "long multi-part message"
+    if features["small_talk"]:
+        return "fast", "small talk"
+    if (
+        features["words"] <= FAST_MAX_WORDS
+        and not features["question"]
+        and not features["comparison"]  # "Compare Bordeaux and Lyon": places outside the gazetteer
+        and not features["tool_hint"]
+        and not features["places"]
+        and not features["facts"]
+    ):
+        return "fast", "short statement"
+    return "standard", "default"
+
+
+class TurnRouter:
+    """Routes turns to tiers and keeps per-tier counters and latencies."""
+
+    def __init__(self):
+        self.counts: Dict[str, int] = {tier: 0 for tier in TIER_MODELS}
+        self.errors: Dict[str, int] = {tier: 0 for tier in TIER_MODELS}
+        self.latency: Dict[str, LatencyWindow] = {tier: LatencyWindow() for tier in TIER_MODELS}
+
+    def route(self, user_message: str, messages: Optional[List[dict]] = None) -> RouteDecision:
+        features = turn_features(user_message, messages)
+        tier, reason = classify(features)
+        self.counts[tier] += 1
+        return RouteDecision(
+            tier=tier,
+            reason=reason,
+            model=MODELS[TIER_MODELS[tier]] if TIER_MODELS[tier] else None,
+            features=features,
+            started_at=time.perf_counter(),
+        )
+
+    def record_outcome(
+        self,
+        decision: RouteDecision,
+        tool_calls: Optional[int] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        """Log how a routed turn went so thresholds can be tuned."""
+        latency = time.perf_counter() - decision.started_at
+        self.latency[decision.tier].add(latency)
+        if error:
+            self.errors[decision.tier] += 1
+
+        record = {
+            "tier": decision.tier,
+            "reason": decision.reason,
+            "model": decision.model,
+            "features": decision.features,
+            "latency_ms": round(latency * 1000, 1),
+            "tool_calls": tool_calls,
+            "error": error,
+        }
+        if os.getenv("LOGFIRE_TOKEN"):
+            logfire.info("Turn routed to {tier}", **record)
+        if _routing_logger:
+            _routing_logger.info(json.dumps(record))
+
+    def metrics(self) -> dict:
+        return {
+            tier: {
+                "turns": self.counts[tier],
+                "errors": self.errors[tier],
+                "latency": self.latency[tier].summary(),
+            }
+            for tier in TIER_MODELS
+        }
+
+
+turn_router = TurnRouter()
+register_metrics("turn_routing", turn_router.metrics)
@@ -0,0 +1 @@
+"""Offline evaluations for gateway agents."""
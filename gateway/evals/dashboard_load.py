@@ -0,0 +1,177 @@
+"""
+Idle-stream load test for /dashboard/events
+
+Starts one uvicorn worker serving the gateway in a subprocess, opens
+idle dashboard streams in steps, and after each step reports the
+worker's RSS, memory per idle stream, the heartbeats clients actually
+received, and the hub's heartbeat tick time. The sustainable maximum
+per worker is extrapolated from the measured per-stream cost and
+--memory-mb, and capped by the open-file limit.
+
+Usage (from gateway/):
+    python -m evals.dashboard_load --steps 1000 5000 10000
+    python -m evals.dashboard_load --mode classic --steps 1000 5000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import time
+from typing import List
+
+
+def rss_bytes(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class IdleClient:
+    """A raw-socket SSE client that only counts heartbeats."""
+
+    def __init__(self):
+        self.heartbeats = 0
+        self.evicted = False
+        self.task: asyncio.Task = None
+
+    async def run(self, port: int, user_id: str, ready: asyncio.Event) -> None:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(
+            f"GET /dashboard/events?user_id={user_id} HTTP/1.1\r\n"
+            f"Host: localhost\r\nAccept: text/event-stream\r\n\r\n".encode()
+        )
+        await writer.drain()
+        await reader.readuntil(b"\r\n\r\n")  # Response headers
+        ready.set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                if b"event: heartbeat" in line:
+                    self.heartbeats += 1
+                elif b"event: evicted" in line:
+                    self.evicted = True
+        finally:
+            writer.close()
+
+
+async def fetch_metrics(port: int) -> dict:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(b"GET /health/metrics HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n")
+    await writer.drain()
+    raw = await reader.read()
+    writer.close()
+    body = raw.split(b"\r\n\r\n", 1)[1]
+    if b"transfer-encoding: chunked" in raw.lower().split(b"\r\n\r\n", 1)[0]:
+        body = b"".join(body.split(b"\r\n")[1::2])
+    return json.loads(body).get("dashboard_events", {})
+
+
+async def open_clients(port: int, clients: List[IdleClient], count: int, batch: int) -> None:
+    while len(clients) < count:
+        wave = []
+        for _ in range(min(batch, count - len(clients))):
+            client, ready = IdleClient(), asyncio.Event()
+            client.task = asyncio.create_task(client.run(port, f"load-{len(clients)}", ready))
+            clients.append(client)
+            wave.append(ready.wait())
+        await asyncio.wait_for(asyncio.gather(*wave), timeout=60)
+
+
+async def run(args) -> dict:
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    port = free_port()
+    env = {
+        **os.environ,
+        "DASHBOARD_EVENTS_MODE": args.mode,
+        "DASHBOARD_HEARTBEAT_SECONDS": str(args.heartbeat),
+        "DASHBOARD_MAX_CONNECTIONS": str(max(args.steps) + 1),
+        "GOOGLE_API_KEY": os.environ.get("GOOGLE_API_KEY", "load-test"),
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+         "--log-level", "warning", "--timeout-graceful-shutdown", "5"],
+        env=env,
+    )
+    try:
+        for _ in range(100):
+            if server.poll() is not None:
+                raise RuntimeError("uvicorn exited during startup")
+            try:
+                await fetch_metrics(port)
+                break
+            except OSError:
+                await asyncio.sleep(0.2)
+        baseline = rss_bytes(server.pid)
+
+        clients: List[IdleClient] = []
+        steps = []
+        for count in sorted(args.steps):
+            await open_clients(port, clients, count, args.batch)
+            before = sum(c.heartbeats for c in clients)
+            await asyncio.sleep(args.heartbeat * 2 + 1)  # Let two heartbeat rounds pass
+            received = sum(c.heartbeats for c in clients) - before
+            rss = rss_bytes(server.pid)
+            hub = await fetch_metrics(port)
+            steps.append({
+                "idle_streams": count,
+                "rss_mb": round(rss / 2**20, 1),
+                "bytes_per_stream": int((rss - baseline) / count),
+                "heartbeats_per_stream": round(received / count, 2),
+                "evicted": sum(c.evicted for c in clients),
+                "heartbeat_tick": hub.get("heartbeat_tick"),
+            })
+            print(json.dumps(steps[-1]))
+
+        per_stream = max(1, steps[-1]["bytes_per_stream"])
+        memory_bound = int((args.memory_mb * 2**20 - baseline) / per_stream)
+        for client in clients:
+            client.task.cancel()
+        await asyncio.gather(*(client.task for client in clients), return_exceptions=True)
+        return {
+            "mode": args.mode,
+            "baseline_rss_mb": round(baseline / 2**20, 1),
+            "steps": steps,
+            "memory_budget_mb": args.memory_mb,
+            "max_idle_streams_by_memory": memory_bound,
+            "max_idle_streams_by_fd_limit": hard,
+            "max_idle_streams_per_worker": min(memory_bound, hard),
+        }
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mode", choices=["lean", "classic"], default="lean")
+    parser.add_argument("--steps", type=int, nargs="+", default=[1000, 5000, 10000])
+    parser.add_argument("--batch", type=int, default=500, help="connections opened concurrently")
+    parser.add_argument("--heartbeat", type=float, default=2.0, help="heartbeat interval for the run")
+    parser.add_argument("--memory-mb", type=int, default=512, help="per-worker memory budget")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    report = asyncio.run(run(args))
+    report["elapsed_s"] = round(time.perf_counter() - start, 1)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Fact extraction evaluation - rules vs LLM
+
+Scores the rule extractor (and optionally fact_extractor) against the
+labeled set in fact_extraction.jsonl: precision, recall, coverage,
+confidence calibration and per-message latency.
+
+Usage (from gateway/):
+    python -m evals.fact_extraction          # rules only, offline
+    python -m evals.fact_extraction --llm    # also run the Haiku extractor
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from agents.extractor import ExtractedFact, fact_extractor
+from agents.rule_extractor import extract_fact_by_rules
+
+DATASET = Path(__file__).with_name("fact_extraction.jsonl")
+
+
+def load_dataset() -> List[dict]:
+    with open(DATASET) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _normalize(value: str) -> str:
+    return "".join(ch for ch in value.lower() if ch.isalnum())
+
+
+def is_correct(predicted: Optional[ExtractedFact], expected: Optional[dict]) -> bool:
+    if predicted is None or expected is None:
+        return predicted is None and expected is None
+    if predicted.fact_type != expected["fact_type"]:
+        return False
+    got, want = _normalize(predicted.value), _normalize(expected["value"])
+    return want in got or got in want
+
+
+def score(
+    name: str,
+    rows: List[dict],
+    predictions: List[Tuple[Optional[ExtractedFact], float]],
+) -> dict:
+    tp = sum(
+        1 for row, (pred, _) in zip(rows, predictions)
+        if pred is not None and row["expected"] is not None and is_correct(pred, row["expected"])
+    )
+    predicted = sum(1 for pred, _ in predictions if pred is not None)
+    expected = sum(1 for row in rows if row["expected"] is not None)
+    latencies = sorted(latency for _, latency in predictions)
+
+    # Calibration: accuracy of predictions bucketed by stated confidence
+    buckets = {}
+    for row, (pred, _) in zip(rows, predictions):
+        if pred is None:
+            continue
+        bucket = round(pred.confidence, 1)
+        hits, total = buckets.get(bucket, (0, 0))
+        buckets[bucket] = (hits + is_correct(pred, row["expected"]), total + 1)
+
+    return {
+        "extractor": name,
+        "precision": round(tp / predicted, 3) if predicted else 0.0,
+        "recall": round(tp / expected, 3) if expected else 0.0,
+        "coverage": round(predicted / len(rows), 3),
+        "latency_p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "latency_p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 3),
+        "calibration": {
+            str(conf): f"{hits}/{total}" for conf, (hits, total) in sorted(buckets.items())
+        },
+    }
+
+
+def run_rules(rows: List[dict]) -> List[Tuple[Optional[ExtractedFact], float]]:
+    results = []
+    for row in rows:
+        start = time.perf_counter()
+        fact = extract_fact_by_rules(row["message"])
+        results.append((fact, time.perf_counter() - start))
+    return results
+
+
+async def run_llm(rows: List[dict]) -> List[Tuple[Optional[ExtractedFact], float]]:
+    results = []
+    for row in rows:
+        start = time.perf_counter()
+        try:
+            fact = (await fact_extractor.run(row["message"])).output
+        except Exception:
+            fact = None
+        results.append((fact, time.perf_counter() - start))
+    return results
+
+
+def combine(
+    rules: List[Tuple[Optional[ExtractedFact], float]],
+    llm: List[Tuple[Optional[ExtractedFact], float]],
+) -> List[Tuple[Optional[ExtractedFact], float]]:
+    """What extract_fact() does: rules, then the LLM only on misses."""
+    return [
+        rule if rule[0] is not None else (llm_fact, rule[1] + llm_latency)
+        for rule, (llm_fact, llm_latency) in zip(rules, llm)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--llm", action="store_true", help="also evaluate the LLM extractor")
+    args = parser.parse_args()
+
+    rows = load_dataset()
+    rules = run_rules(rows)
+    reports = [score("rules", rows, rules)]
+
+    if args.llm:
+        llm = asyncio.run(run_llm(rows))
+        reports.append(score("llm", rows, llm))
+        reports.append(score("rules+llm", rows, combine(rules, llm)))
+
+    for report in reports:
+        print(json.dumps(report, indent=2))
+
+    misses = [
+        (row["message"], row["expected"], pred.model_dump() if pred else None)
+        for row, (pred, _) in zip(rows, rules)
+        if pred is not None and not is_correct(pred, row["expected"])
+    ]
+    if misses:
+        print("\nRule false positives:")
+        for message, expected, predicted in misses:
+            print(f"  {message!r}: expected {expected}, got {predicted}")
+
+
+if __name__ == "__main__":
+    main()
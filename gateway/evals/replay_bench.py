@@ -0,0 +1,79 @@
+"""
+Offline agent benchmark from recorded cassettes
+
+Replays every cassette in AGENT_CASSETTE_DIR (or --dir) through the app
+agent that recorded it (its app_id; relocation for older cassettes) with
+stub model and services, and reports per-turn latency.
+With --speed 0 the recorded network time is removed entirely, leaving
+only gateway-side overhead; --profile dumps a cProfile of the run.
+
+Usage (from gateway/):
+    python -m evals.replay_bench --speed 0 --repeat 5
+    python -m evals.replay_bench --speed 1 --profile replay.prof
+"""
+
+import argparse
+import asyncio
+import cProfile
+import json
+import time
+from pathlib import Path
+
+from agents import QuestContext, get_app_agent, get_app_config
+from agents.cassette import CASSETTE_DIR, Cassette
+from utils.metrics import LatencyWindow
+
+
+async def replay_cassette(cassette: Cassette, speed: float, window: LatencyWindow) -> None:
+    config = get_app_config(cassette.app_id)
+    agent = get_app_agent(config.app_id)
+    deps = QuestContext(
+        app_id=config.app_id,
+        session_id=cassette.session_id,
+        user_id=cassette.session_id,
+        **{name: cassette.replay_service(name, speed) for name in cassette.services},
+    )
+    with agent.override(model=cassette.replay_model(speed)):
+        for turn in cassette.turns:
+            start = time.perf_counter()
+            async with agent.run_stream(turn["prompt"], deps=deps) as result:
+                async for _ in result.stream_text(delta=True):
+                    pass
+            window.add(time.perf_counter() - start)
+
+
+async def run(paths, speed: float, repeat: int) -> dict:
+    window = LatencyWindow(size=100_000)
+    for _ in range(repeat):
+        # Reload each time: replay consumes the recorded queues
+        await asyncio.gather(*(
+            replay_cassette(Cassette.load(path), speed, window) for path in paths
+        ))
+    return {"cassettes": len(paths), "speed": speed, "turn_latency": window.summary()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dir", type=Path, default=CASSETTE_DIR)
+    parser.add_argument("--speed", type=float, default=0.0, help="0 = no recorded delays")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--profile", type=Path, help="write cProfile stats to this file")
+    args = parser.parse_args()
+
+    paths = sorted(args.dir.glob("*.json"))
+    if not paths:
+        raise SystemExit(f"No cassettes in {args.dir}; record some with AGENT_CASSETTE_MODE=record")
+
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler:
+        profiler.enable()
+    report = asyncio.run(run(paths, args.speed, args.repeat))
+    if profiler:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Long-transcript summarization benchmark
+
+Generates a synthetic voice transcript (10k messages by default) lazily
+and summarizes it with agents/summary_pipeline.py against a stub model
+with a fixed per-call latency. Reports wall time, model calls, peak
+Python memory (tracemalloc) and how many facts survived the merges,
+next to what a single-prompt summarizer_agent call would need.
+
+Run it with a larger --messages to check that peak memory stays flat.
+
+Usage (from gateway/):
+    python -m evals.summarize_bench
+    python -m evals.summarize_bench --messages 50000 --latency 0.01
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import tracemalloc
+from typing import Iterator, List
+
+from pydantic_ai.messages import ModelMessage, ModelResponse, ToolCallPart
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+
+from agents.rule_extractor import extract_all_facts, find_places
+from agents.summarizer import summarizer_agent
+from agents.summary_pipeline import SummaryPipeline
+from agents.token_budget import count_tokens
+
+CONTEXT_LIMIT_TOKENS = 200_000
+
+USER_LINES = [
+    "I'm thinking about moving to {place} next year.",
+    "My budget is around ${budget} a month.",
+    "We have {kids} kids so schools matter a lot.",
+    "I work remotely as a software engineer.",
+    "What does the digital nomad visa in {place} require?",
+    "How expensive is rent in {place} compared to Lisbon?",
+    "Honestly I'm still not sure, maybe {place} instead.",
+]
+ASSISTANT_LINE = (
+    "Good question. For {place}, the main things to check are the visa route, "
+    "healthcare registration, and rental deposits, which are usually two months."
+)
+PLACES = ["Portugal", "Spain", "Cyprus", "Dubai", "Malta", "Greece", "Mexico", "Thailand"]
+
+
+def synthetic_transcript(count: int, seed: int = 7) -> Iterator[dict]:
+    rng = random.Random(seed)
+    for i in range(count):
+        place = rng.choice(PLACES)
+        if i % 2 == 0:
+            template = rng.choice(USER_LINES)
+            text = template.format(place=place, budget=rng.choice([2000, 3000, 4500]), kids=rng.randint(1, 3))
+            yield {"role": "user", "content": text}
+        else:
+            yield {"role": "assistant", "content": ASSISTANT_LINE.format(place=place)}
+
+
+def stub_model(latency: float) -> FunctionModel:
+    """Summaries built from the prompt with the rule extractor, after `latency` seconds."""
+
+    async def respond(messages: List[ModelMessage], info: AgentInfo) -> ModelResponse:
+        await asyncio.sleep(latency)
+        prompt = messages[-1].parts[-1].content
+        # Distinct lines only: keeps the stub's own CPU time out of the measurement
+        user_lines = list(dict.fromkeys(
+            line[6:] for line in prompt.splitlines() if line.startswith("user: ")
+        ))
+        facts = [
+            f"{fact.fact_type}: {fact.value}"
+            for line in user_lines
+            for fact in extract_all_facts(line)
+        ]
+        places = sorted({place for line in user_lines for place in find_places(line)})
+        output = {
+            "title": f"Relocation chat: {', '.join(places[:3]) or 'merged parts'}",
+            "summary": prompt[:400],
+            "key_facts_mentioned": facts,
+            "topics_discussed": ["visa", "cost of living"] + (["schools"] if "school" in prompt else []),
+        }
+        return ModelResponse(parts=[ToolCallPart(info.output_tools[0].name, output)])
+
+    return FunctionModel(respond, model_name="summary-stub")
+
+
+def single_prompt_cost(count: int) -> dict:
+    """What the one-shot approach would send: the whole transcript in one prompt."""
+    tracemalloc.start()
+    prompt = "\n".join(f"{m['role']}: {m['content']}" for m in synthetic_transcript(count))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    tokens = count_tokens(prompt)
+    return {
+        "prompt_tokens": tokens,
+        "fits_context": tokens <= CONTEXT_LIMIT_TOKENS,
+        "peak_memory_mb": round(peak / 2**20, 2),
+    }
+
+
+async def run_pipeline(args) -> dict:
+    pipeline = SummaryPipeline(chunk_tokens=args.chunk_tokens, concurrency=args.concurrency)
+    tracemalloc.start()
+    start = time.perf_counter()
+    with summarizer_agent.override(model=stub_model(args.latency)):
+        summary = await pipeline.run(synthetic_transcript(args.messages))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "messages": args.messages,
+        "elapsed_s": round(elapsed, 2),
+        "serial_model_time_s": round(pipeline.model_calls * args.latency, 2),
+        "peak_memory_mb": round(peak / 2**20, 2),
+        **pipeline.stats(),
+        "title": summary.title,
+        "key_facts": len(summary.key_facts_mentioned),
+        "topics": summary.topics_discussed,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=10_000)
+    parser.add_argument("--chunk-tokens", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.25, help="stub seconds per model call")
+    args = parser.parse_args()
+
+    report = {
+        "pipeline": asyncio.run(run_pipeline(args)),
+        "single_prompt": single_prompt_cost(args.messages),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -19,6 +19,10 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+from utils.event_hub import dashboard_hub
+from utils.loop_monitor import start_loop_monitor, stop_loop_monitor
+from utils.transcripts import transcript_writer
+
 # Initialize Logfire for observability
 if os.getenv("LOGFIRE_TOKEN"):
     logfire.configure(
@@ -31,9 +35,15 @@ async def lifespan(app: FastAPI):
     """Application lifecycle management."""
     # Startup
     print("🚀 Quest App Gateway starting...")
+    if start_loop_monitor():
+        print("⏱️  Event-loop monitor enabled")
+    await transcript_writer.start()
     yield
     # Shutdown
     print("👋 Quest App Gateway shutting down...")
+    await dashboard_hub.stop()
+    await transcript_writer.stop()
+    await stop_loop_monitor()
 
 
 app = FastAPI(
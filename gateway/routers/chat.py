@@ -12,7 +12,11 @@ from fastapi import APIRouter, Request, Header
 from fastapi.responses import StreamingResponse
 from typing import Optional
 
-from agents import quest_agent, QuestContext
+from agents import QuestContext, get_app_agent, get_app_config
+from agents.cassette import cassette_session
+from agents.token_budget import token_accounting
+from agents.turn_router import turn_router
+from utils.transcripts import transcript_writer
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
@@ -51,33 +55,50 @@ async def chat_completions(
         )
 
     # Build context with service references
+    app_config = get_app_config(x_app_id)
+    agent = get_app_agent(x_app_id)
     context = QuestContext(
-        app_id=x_app_id,
+        app_id=app_config.app_id,
         user_id=x_stack_user_id,
         session_id=session_id,
+        knowledge_graph=app_config.knowledge_graph,
         # Services will be injected at runtime
     )
 
+    # Pick fast / standard / reasoning model tier for this turn
+    route = turn_router.route(user_message, messages)
+
     async def generate_sse():
         """Generate Vercel AI-compatible SSE events."""
+        tool_calls = 0
+        reply_parts = []
         try:
             # Immediate thinking feedback
             yield f'data: {json.dumps({"type": "thinking", "content": "Let me check on that..."})}\n\n'
 
-            async with quest_agent.run_stream(user_message, deps=context) as result:
-                async for event in result.stream_events():
-                    if event.type == "tool_call":
-                        yield f'data: {json.dumps({"type": "tool_call", "name": event.tool_name})}\n\n'
+            with cassette_session(agent, context, user_message, route.model) as deps, \
+                    token_accounting(*app_config.prompt_parts(), user_message) as ledger:
+                async with agent.run_stream(user_message, deps=deps, model=route.model) as result:
+                    async for event in result.stream_events():
+                        if event.type == "tool_call":
+                            tool_calls += 1
+                            yield f'data: {json.dumps({"type": "tool_call", "name": event.tool_name})}\n\n'
+
+                        elif event.type == "tool_result":
+                            yield f'data: {json.dumps({"type": "tool_result", "name": event.tool_name, "result": str(event.result)[:200]})}\n\n'
 
-                    elif event.type == "tool_result":
-                        yield f'data: {json.dumps({"type": "tool_result", "name": event.tool_name, "result": str(event.result)[:200]})}\n\n'
+                        elif event.type == "text_delta":
+                            reply_parts.append(event.text)
+                            yield f'data: {json.dumps({"type": "text_delta", "text": event.text})}\n\n'
 
-                    elif event.type == "text_delta":
-                        yield f'data: {json.dumps({"type": "text_delta", "text": event.text})}\n\n'
+                    ledger.record_usage(result.usage)
 
+            turn_router.record_outcome(route, tool_calls=tool_calls)
+            transcript_writer.capture_turn(x_stack_user_id, user_message, "".join(reply_parts), "chat")
             yield 'data: [DONE]\n\n'
 
         except Exception as e:
+            turn_router.record_outcome(route, tool_calls=tool_calls, error=str(e))
             yield f'data: {json.dumps({"type": "error", "error": str(e)})}\n\n'
             yield 'data: [DONE]\n\n'
 
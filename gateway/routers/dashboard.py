@@ -1,14 +1,22 @@
 """Dashboard endpoints for SSE events and profile aggregation."""
 
 import asyncio
+import os
 from datetime import datetime
 from typing import Optional
 
-from fastapi import APIRouter, Header
+from fastapi import APIRouter, Header, Response
 from sse_starlette.sse import EventSourceResponse
 
+from utils.event_hub import dashboard_hub
+from utils.profile_aggregator import profile_aggregator
+
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 
+# "lean": shared heartbeat wheel + connection caps (utils/event_hub.py)
+# "classic": one sleeping generator per connection
+EVENTS_MODE = os.getenv("DASHBOARD_EVENTS_MODE", "lean")
+
 
 @router.get("/events")
 async def stream_dashboard_events(
@@ -23,9 +31,13 @@ async def stream_dashboard_events(
     - fact_updated: Existing fact updated
     - profile_synced: Profile synced to Zep
     - activity: General activity events
+    - evicted: Stream closed by the server (cap or idle); reconnect after `retry`
     """
     effective_user_id = x_stack_user_id or user_id
 
+    if EVENTS_MODE == "lean":
+        return dashboard_hub.response(dashboard_hub.connect(effective_user_id))
+
     async def event_generator():
         # In production, use Redis PubSub or similar
         # For now, we'll use a simple heartbeat
@@ -35,20 +47,35 @@ async def stream_dashboard_events(
                 "event": "heartbeat",
                 "data": datetime.utcnow().isoformat(),
             }
-            await asyncio.sleep(30)
+            await asyncio.sleep(dashboard_hub.heartbeat_interval)
 
     return EventSourceResponse(event_generator())
 
 
 @router.get("/profile/live")
 async def get_live_profile(
+    response: Response,
     x_stack_user_id: str = Header(..., alias="X-Stack-User-Id"),
+    if_none_match: Optional[str] = Header(default=None, alias="If-None-Match"),
 ):
-    """Get complete profile with Zep entities for dashboard display."""
-    # TODO: Aggregate from Neon + Zep + SuperMemory
+    """
+    Get complete profile with Zep entities for dashboard display.
+
+    Neon, Zep and SuperMemory are queried concurrently under one deadline;
+    `sources` reports which ones answered in time. Send the returned ETag
+    as If-None-Match to get a 304 when nothing changed.
+    """
+    live = await profile_aggregator.get(x_stack_user_id)
+
+    if if_none_match and live.etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers={"ETag": live.etag})
+
+    response.headers["ETag"] = live.etag
+    response.headers["Cache-Control"] = "private, no-cache"
     return {
-        "profile": {},
-        "entities": [],
-        "memories": [],
-        "last_updated": datetime.utcnow().isoformat(),
+        "profile": live.profile,
+        "entities": live.entities,
+        "memories": live.memories,
+        "sources": live.sources,
+        "last_updated": live.last_updated,
     }
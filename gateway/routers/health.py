@@ -2,6 +2,8 @@
 
 from fastapi import APIRouter
 
+from utils.metrics import collect_metrics
+
 router = APIRouter(prefix="/health", tags=["health"])
 
 
@@ -14,3 +16,9 @@ async def health_check():
 async def readiness_check():
     # Add service checks here
     return {"status": "ready"}
+
+
+@router.get("/metrics")
+async def metrics():
+    """Per-worker runtime metrics (event-loop lag, etc.)."""
+    return collect_metrics()
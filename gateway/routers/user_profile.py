@@ -6,6 +6,8 @@ from datetime import datetime
 from fastapi import APIRouter, Header, HTTPException
 from pydantic import BaseModel
 
+from utils.profile_aggregator import profile_aggregator
+
 router = APIRouter(prefix="/user/profile", tags=["user_profile"])
 
 
@@ -48,6 +50,7 @@ async def create_fact(
 ):
     """Create a new fact (user-initiated)."""
     # TODO: Insert into Neon, sync to Zep
+    await profile_aggregator.invalidate(x_stack_user_id)
     return {"id": "new-id", "status": "created"}
 
 
@@ -59,6 +62,7 @@ async def update_fact(
 ):
     """Update an existing fact."""
     # TODO: Update in Neon, sync to Zep
+    await profile_aggregator.invalidate(x_stack_user_id)
     return {"id": fact_id, "status": "updated"}
 
 
@@ -69,6 +73,7 @@ async def delete_fact(
 ):
     """Delete (supersede) a fact."""
     # TODO: Mark as superseded in Neon
+    await profile_aggregator.invalidate(x_stack_user_id)
     return {"id": fact_id, "status": "deleted"}
 
 
@@ -79,4 +84,5 @@ async def verify_fact(
 ):
     """User confirms an AI-extracted fact."""
     # TODO: Update source to user_verified, confidence to 1.0
+    await profile_aggregator.invalidate(x_stack_user_id)
     return {"id": fact_id, "status": "verified"}
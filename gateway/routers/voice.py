@@ -1,6 +1,7 @@
 """Voice endpoints for Hume EVI integration."""
 
 import os
+import hashlib
 from datetime import datetime
 from uuid import uuid4
 import json
@@ -9,13 +10,42 @@ from fastapi import APIRouter, Request, Header
 from fastapi.responses import StreamingResponse
 import httpx
 
-from agents import quest_agent, QuestContext
+from agents import QuestContext, get_app_agent, get_app_config
+from agents.cassette import cassette_session
+from agents.token_budget import token_accounting
+from agents.turn_router import turn_router
+from utils.transcripts import transcript_writer
+from utils.broadcast import InFlightRegistry
+from utils.shared_state import shared_state
 
 router = APIRouter(prefix="/voice", tags=["voice"])
 
 HUME_API_KEY = os.getenv("HUME_API_KEY")
 HUME_SECRET_KEY = os.getenv("HUME_SECRET_KEY")
 
+# Hume EVI retries slow completions; retries attach to the running generation.
+# Finished generations are also published to shared state for the linger
+# window, so a retry routed to another worker replays instead of re-running.
+def _is_error_chunk(chunk: str) -> bool:
+    return chunk.startswith('data: {"id": "error"')
+
+
+inflight_generations: InFlightRegistry[str] = InFlightRegistry(
+    linger=float(os.getenv("VOICE_DEDUP_LINGER_SECONDS", "5")),
+    is_error=_is_error_chunk,  # Failed turns aren't replayed to retries
+)
+
+
+async def _replay(chunks: list):
+    for chunk in chunks:
+        yield chunk
+
+
+def request_fingerprint(session_key: str, user_message: str, message_count: int) -> str:
+    """Identify a conversation turn so Hume retries map to the same generation."""
+    raw = json.dumps([session_key, user_message, message_count])
+    return hashlib.sha256(raw.encode()).hexdigest()
+
 
 @router.get("/access-token")
 async def get_access_token():
@@ -37,6 +67,7 @@ async def get_access_token():
 async def voice_chat_completions(
     request: Request,
     custom_session_id: str = None,
+    app_id: str = "relocation",
     x_stack_user_id: str = Header(default=None, alias="X-Stack-User-Id"),
 ):
     """
@@ -44,6 +75,10 @@ async def voice_chat_completions(
 
     Hume sends messages in OpenAI format, we process with Pydantic AI agent
     and return OpenAI-compatible SSE for Hume to speak.
+
+    Hume retries slow responses. Requests for the same turn (session, last
+    user message, message count) share one agent run instead of starting
+    another.
     """
     body = await request.json()
 
@@ -70,50 +105,64 @@ async def voice_chat_completions(
 
     # Build context
     user_id = custom_session_id or x_stack_user_id or "anonymous"
+    app_config = get_app_config(app_id)
+    agent = get_app_agent(app_id)
     context = QuestContext(
-        app_id="relocation",
+        app_id=app_config.app_id,
         user_id=user_id if user_id != "anonymous" else None,
         session_id=custom_session_id or str(uuid4()),
+        knowledge_graph=app_config.knowledge_graph,
         # Services will be injected at runtime
     )
 
     async def generate_sse():
         """Generate SSE events in OpenAI format for Hume."""
+        # Routed inside the generation so de-duplicated retries aren't counted twice
+        route = turn_router.route(user_message, messages)
+        reply_parts = []
         try:
-            async with quest_agent.run_stream(user_message, deps=context) as result:
-                chunk_id = f"chatcmpl-{int(datetime.utcnow().timestamp())}"
-
-                async for event in result.stream_events():
-                    if event.type == "text_delta":
-                        chunk = {
-                            "id": chunk_id,
-                            "object": "chat.completion.chunk",
-                            "created": int(datetime.utcnow().timestamp()),
-                            "model": "quest-agent",
-                            "choices": [{
-                                "index": 0,
-                                "delta": {"content": event.text},
-                                "finish_reason": None
-                            }]
-                        }
-                        yield f"data: {json.dumps(chunk)}\n\n"
-
-                # Final chunk
-                final_chunk = {
-                    "id": chunk_id,
-                    "object": "chat.completion.chunk",
-                    "created": int(datetime.utcnow().timestamp()),
-                    "model": "quest-agent",
-                    "choices": [{
-                        "index": 0,
-                        "delta": {},
-                        "finish_reason": "stop"
-                    }]
-                }
-                yield f"data: {json.dumps(final_chunk)}\n\n"
-                yield "data: [DONE]\n\n"
+            with cassette_session(agent, context, user_message, route.model) as deps, \
+                    token_accounting(*app_config.prompt_parts(), user_message) as ledger:
+                async with agent.run_stream(user_message, deps=deps, model=route.model) as result:
+                    chunk_id = f"chatcmpl-{int(datetime.utcnow().timestamp())}"
+
+                    async for event in result.stream_events():
+                        if event.type == "text_delta":
+                            reply_parts.append(event.text)
+                            chunk = {
+                                "id": chunk_id,
+                                "object": "chat.completion.chunk",
+                                "created": int(datetime.utcnow().timestamp()),
+                                "model": "quest-agent",
+                                "choices": [{
+                                    "index": 0,
+                                    "delta": {"content": event.text},
+                                    "finish_reason": None
+                                }]
+                            }
+                            yield f"data: {json.dumps(chunk)}\n\n"
+
+                    ledger.record_usage(result.usage)
+
+                    # Final chunk
+                    final_chunk = {
+                        "id": chunk_id,
+                        "object": "chat.completion.chunk",
+                        "created": int(datetime.utcnow().timestamp()),
+                        "model": "quest-agent",
+                        "choices": [{
+                            "index": 0,
+                            "delta": {},
+                            "finish_reason": "stop"
+                        }]
+                    }
+                    yield f"data: {json.dumps(final_chunk)}\n\n"
+                    yield "data: [DONE]\n\n"
+            turn_router.record_outcome(route)
+            transcript_writer.capture_turn(context.user_id, user_message, "".join(reply_parts), "voice")
 
         except Exception as e:
+            turn_router.record_outcome(route, error=str(e))
             error_chunk = {
                 "id": "error",
                 "object": "chat.completion.chunk",
@@ -126,7 +175,36 @@ async def voice_chat_completions(
             yield f"data: {json.dumps(error_chunk)}\n\n"
             yield "data: [DONE]\n\n"
 
+    # Without a session we can't tell a retry from another user saying the same thing
+    session_key = custom_session_id or x_stack_user_id
+    if not session_key:
+        return StreamingResponse(
+            generate_sse(),
+            media_type="text/event-stream"
+        )
+
+    fingerprint = request_fingerprint(
+        f"{app_config.app_id}:{session_key}", user_message, len(messages)
+    )
+    shared_key = f"voice:{fingerprint}"
+
+    if fingerprint not in inflight_generations:
+        finished = await shared_state.get_json(shared_key)
+        if finished is not None:
+            return StreamingResponse(_replay(finished), media_type="text/event-stream")
+
+    async def generate_and_publish():
+        chunks = []
+        async for chunk in generate_sse():
+            chunks.append(chunk)
+            yield chunk
+        failed = any(_is_error_chunk(chunk) for chunk in chunks)
+        if not failed and inflight_generations.linger > 0:
+            await shared_state.set_json(shared_key, chunks, inflight_generations.linger)
+
+    broadcaster, _ = inflight_generations.get_or_start(fingerprint, generate_and_publish)
+
     return StreamingResponse(
-        generate_sse(),
+        broadcaster.subscribe(),
         media_type="text/event-stream"
     )
@@ -1,5 +1,14 @@
 """Gateway utilities."""
 
 from .llm_config import get_model, MODELS
+from .broadcast import StreamBroadcaster, InFlightRegistry
+from .shared_state import SharedState, shared_state
 
-__all__ = ["get_model", "MODELS"]
+__all__ = [
+    "get_model",
+    "MODELS",
+    "StreamBroadcaster",
+    "InFlightRegistry",
+    "SharedState",
+    "shared_state",
+]
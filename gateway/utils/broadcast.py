@@ -0,0 +1,125 @@
+"""
+Stream broadcasting for de-duplicated generations
+
+A single producer (e.g. one quest_agent.run_stream) fans out to any
+number of consumers. Late subscribers replay the chunks produced so far
+and then follow the live stream, so a retried request sees the exact
+same output as the original one.
+
+The producer runs as its own task: a consumer disconnecting does not
+cancel the generation, which lets a retry pick up where it left off.
+"""
+
+import asyncio
+from typing import AsyncIterator, Callable, Dict, Generic, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class StreamBroadcaster(Generic[T]):
+    """Runs one async iterator and lets many consumers read its output."""
+
+    def __init__(self, source: AsyncIterator[T], is_error: Optional[Callable[[T], bool]] = None):
+        self._chunks: List[T] = []
+        self._done = False
+        self._is_error = is_error
+        self.failed = False  # Source raised or produced an error chunk
+        self._changed = asyncio.Condition()
+        self.subscribers = 0
+        self.task = asyncio.create_task(self._pump(source))
+
+    @property
+    def done(self) -> bool:
+        return self._done
+
+    async def _pump(self, source: AsyncIterator[T]) -> None:
+        try:
+            async for chunk in source:
+                if self._is_error is not None and self._is_error(chunk):
+                    self.failed = True
+                async with self._changed:
+                    self._chunks.append(chunk)
+                    self._changed.notify_all()
+        except BaseException:
+            self.failed = True
+            raise
+        finally:
+            async with self._changed:
+                self._done = True
+                self._changed.notify_all()
+
+    async def subscribe(self) -> AsyncIterator[T]:
+        """Yield every chunk from the start, then follow until the source ends."""
+        self.subscribers += 1
+        position = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(
+                    lambda: position < len(self._chunks) or self._done
+                )
+                pending = self._chunks[position:]
+                finished = self._done
+
+            for chunk in pending:
+                yield chunk
+            position += len(pending)
+
+            if finished and position >= len(self._chunks):
+                return
+
+
+class InFlightRegistry(Generic[T]):
+    """
+    Maps request fingerprints to running broadcasters.
+
+    Entries stay registered for `linger` seconds after the producer
+    finishes so retries that arrive just after completion still attach
+    instead of starting a new run. Failed generations (the source raised,
+    or a chunk matched `is_error`) are dropped at once so a retry runs again.
+    """
+
+    def __init__(self, linger: float = 5.0, is_error: Optional[Callable[[T], bool]] = None):
+        self.linger = linger
+        self.is_error = is_error
+        self._entries: Dict[str, StreamBroadcaster[T]] = {}
+        self.started = 0
+        self.attached = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get_or_start(
+        self,
+        key: str,
+        factory: Callable[[], AsyncIterator[T]],
+    ) -> Tuple[StreamBroadcaster[T], bool]:
+        """
+        Return the broadcaster for `key`, starting `factory()` if none exists.
+
+        The second element is True when a new generation was started.
+        No await happens between lookup and insert, so this is race-free
+        within one event loop.
+        """
+        existing = self._entries.get(key)
+        if existing is not None:
+            self.attached += 1
+            return existing, False
+
+        broadcaster = StreamBroadcaster(factory(), self.is_error)
+        self._entries[key] = broadcaster
+        self.started += 1
+        broadcaster.task.add_done_callback(lambda _: self._expire(key, broadcaster))
+        return broadcaster, True
+
+    def _expire(self, key: str, broadcaster: StreamBroadcaster[T]) -> None:
+        def remove():
+            if self._entries.get(key) is broadcaster:
+                del self._entries[key]
+
+        if self.linger > 0 and not broadcaster.failed:
+            asyncio.get_running_loop().call_later(self.linger, remove)
+        else:
+            remove()
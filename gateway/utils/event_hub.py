@@ -0,0 +1,333 @@
+"""
+Lean connection management for /dashboard/events
+
+An idle dashboard tab used to cost a generator with its own 30 s sleep
+timer plus sse-starlette's per-connection ping task. Here every idle
+stream is just a parked generator waiting on its own Event:
+
+- one timer wheel per worker schedules all heartbeats (and idle checks);
+  one task advances it every `tick` seconds
+- each connection's unsent bytes are accounted for and capped, so a stalled
+  client can't grow memory without bound
+- connections are capped per worker and per user; over the cap, or after
+  `idle_timeout` without real events, the least recently active stream is
+  evicted gracefully with an `evicted` event and a reconnect hint
+
+publish() delivers events to a user's streams on this worker, and to
+in-process listeners registered with subscribe() (the profile snapshot
+cache invalidates itself on fact events this way).
+Counters appear under "dashboard_events" on /health/metrics;
+evals/dashboard_load.py measures memory per idle stream.
+"""
+
+import asyncio
+import inspect
+import json
+import os
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Set, Union
+
+from starlette.responses import StreamingResponse
+
+from .metrics import LatencyWindow, register_metrics
+
+# listener(user_id, data); may return an awaitable, which runs as a task
+Listener = Callable[[str, dict], Union[None, Awaitable[Any]]]
+
+
+def format_sse(event: str, data: str, retry_ms: Optional[int] = None) -> str:
+    lines = [f"event: {event}"]
+    lines += [f"data: {line}" for line in data.splitlines() or [""]]
+    if retry_ms is not None:
+        lines.append(f"retry: {retry_ms}")
+    return "\n".join(lines) + "\n\n"
+
+
+class DashboardConnection:
+    """One open /dashboard/events stream."""
+
+    __slots__ = (
+        "user_id", "queue", "buffered_bytes", "wake", "closed",
+        "connected_at", "last_activity", "last_read", "bytes_sent", "bucket",
+    )
+
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.queue: Deque[str] = deque()
+        self.buffered_bytes = 0
+        self.wake = asyncio.Event()
+        self.closed = False
+        self.connected_at = time.monotonic()
+        self.last_activity = self.connected_at  # Last real (non-heartbeat) event
+        self.last_read = self.connected_at  # Last time the client took a payload
+        self.bytes_sent = 0
+        self.bucket: Optional[int] = None
+
+
+class TimerWheel:
+    """
+    Hashed timer wheel: `slots` buckets of `tick` seconds each.
+
+    schedule() and cancel() are O(1); advance() returns the items whose
+    bucket came due. Delays are rounded up to whole ticks and must fit in
+    one revolution (slots * tick).
+    """
+
+    def __init__(self, tick: float, slots: int):
+        self.tick = tick
+        self.buckets: List[Set[DashboardConnection]] = [set() for _ in range(slots)]
+        self.cursor = 0
+
+    def schedule(self, item: DashboardConnection, delay: float) -> None:
+        ticks = min(len(self.buckets) - 1, max(1, -int(-delay // self.tick)))
+        item.bucket = (self.cursor + ticks) % len(self.buckets)
+        self.buckets[item.bucket].add(item)
+
+    def cancel(self, item: DashboardConnection) -> None:
+        if item.bucket is not None:
+            self.buckets[item.bucket].discard(item)
+            item.bucket = None
+
+    def advance(self) -> Set[DashboardConnection]:
+        self.cursor = (self.cursor + 1) % len(self.buckets)
+        due, self.buckets[self.cursor] = self.buckets[self.cursor], set()
+        for item in due:
+            item.bucket = None
+        return due
+
+
+class DashboardEventHub:
+    """Per-worker registry of dashboard streams with central heartbeats."""
+
+    def __init__(
+        self,
+        heartbeat_interval: float = 30.0,
+        tick: float = 1.0,
+        max_connections: int = 20_000,
+        max_per_user: int = 8,
+        idle_timeout: float = 1800.0,
+        max_buffer_bytes: int = 64 * 1024,
+        reconnect_after_ms: int = 60_000,
+    ):
+        self.heartbeat_interval = heartbeat_interval
+        self.max_connections = max_connections
+        self.max_per_user = max_per_user
+        self.idle_timeout = idle_timeout
+        self.max_buffer_bytes = max_buffer_bytes
+        self.reconnect_after_ms = reconnect_after_ms
+
+        # +1 so a full interval always lands in a future bucket
+        self.wheel = TimerWheel(tick, int(heartbeat_interval / tick) + 1)
+        # Ordered by last activity: the first entry is the eviction candidate
+        self._connections: "OrderedDict[DashboardConnection, None]" = OrderedDict()
+        self._by_user: Dict[str, List[DashboardConnection]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._listeners: Dict[str, List[Listener]] = {}
+        self._listener_tasks: Set[asyncio.Task] = set()
+
+        self.opened = 0
+        self.heartbeats = 0
+        self.evictions: Dict[str, int] = {}
+        self.tick_latency = LatencyWindow()
+
+    def __len__(self) -> int:
+        return len(self._connections)
+
+    def connect(self, user_id: str) -> DashboardConnection:
+        """Register a stream, evicting older ones if a cap is reached."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+        user_connections = self._by_user.setdefault(user_id, [])
+        while len(user_connections) >= self.max_per_user:
+            # Events go to all of a user's tabs alike; a stale tab is the one not reading them
+            stalest = min(user_connections, key=lambda c: c.last_read)
+            self.evict(stalest, "per_user_cap")
+        while len(self._connections) >= self.max_connections:
+            self.evict(next(iter(self._connections)), "worker_cap")
+
+        conn = DashboardConnection(user_id)
+        self._connections[conn] = None
+        user_connections.append(conn)
+        self.opened += 1
+        # First heartbeat right away so proxies see bytes, then every interval
+        self._enqueue(conn, format_sse("heartbeat", datetime.utcnow().isoformat()))
+        self.wheel.schedule(conn, self.heartbeat_interval)
+        return conn
+
+    def disconnect(self, conn: DashboardConnection) -> None:
+        if conn not in self._connections:
+            return
+        del self._connections[conn]
+        self.wheel.cancel(conn)
+        user_connections = self._by_user.get(conn.user_id, [])
+        if conn in user_connections:
+            user_connections.remove(conn)
+        if not user_connections:
+            self._by_user.pop(conn.user_id, None)
+        conn.closed = True
+        conn.wake.set()
+
+    def evict(self, conn: DashboardConnection, reason: str) -> None:
+        """Close a stream gracefully: the client is told when to reconnect."""
+        self.evictions[reason] = self.evictions.get(reason, 0) + 1
+        self._enqueue(conn, format_sse(
+            "evicted", json.dumps({"reason": reason}), retry_ms=self.reconnect_after_ms,
+        ), force=True)
+        self.disconnect(conn)
+
+    def subscribe(self, event: str, listener: Listener) -> None:
+        """Call `listener` on every publish of `event`, whether or not streams are open."""
+        self._listeners.setdefault(event, []).append(listener)
+
+    def _notify(self, user_id: str, event: str, data: dict) -> None:
+        for listener in self._listeners.get(event, []):
+            try:
+                result = listener(user_id, data)
+                if inspect.isawaitable(result):
+                    task = asyncio.ensure_future(result)
+                    self._listener_tasks.add(task)
+                    task.add_done_callback(self._listener_done)
+            except Exception as e:
+                print(f"⚠️  Dashboard event listener failed: {e}")
+
+    def _listener_done(self, task: asyncio.Task) -> None:
+        self._listener_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"⚠️  Dashboard event listener failed: {task.exception()}")
+
+    def publish(self, user_id: str, event: str, data: dict) -> int:
+        """Send an event to the user's streams on this worker; returns how many got it."""
+        self._notify(user_id, event, data)
+        connections = list(self._by_user.get(user_id, []))
+        payload = format_sse(event, json.dumps(data, default=str))
+        now = time.monotonic()
+        for conn in connections:
+            conn.last_activity = now
+            self._connections.move_to_end(conn)
+            self._enqueue(conn, payload)
+        return len(connections)
+
+    def _enqueue(self, conn: DashboardConnection, payload: str, force: bool = False) -> None:
+        size = len(payload)
+        if not force and conn.buffered_bytes + size > self.max_buffer_bytes:
+            # The client stopped reading; its queue would only keep growing
+            self.evict(conn, "slow_consumer")
+            return
+        conn.queue.append(payload)
+        conn.buffered_bytes += size
+        conn.wake.set()
+
+    def _heartbeat(self) -> None:
+        start = time.perf_counter()
+        now = time.monotonic()
+        heartbeat = format_sse("heartbeat", datetime.utcnow().isoformat())  # Shared by all streams
+        for conn in self.wheel.advance():
+            if now - conn.last_activity > self.idle_timeout:
+                self.evict(conn, "idle")
+                continue
+            # A pending backlog already keeps the connection busy
+            if not conn.queue:
+                self._enqueue(conn, heartbeat)
+                self.heartbeats += 1
+            self.wheel.schedule(conn, self.heartbeat_interval)
+        self.tick_latency.add(time.perf_counter() - start)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.wheel.tick)
+            self._heartbeat()
+
+    async def stream(self, conn: DashboardConnection) -> AsyncIterator[str]:
+        """The response body for one connection."""
+        try:
+            while True:
+                await conn.wake.wait()
+                conn.wake.clear()
+                while conn.queue:
+                    payload = conn.queue.popleft()
+                    conn.buffered_bytes -= len(payload)
+                    conn.bytes_sent += len(payload)
+                    yield payload
+                    conn.last_read = time.monotonic()
+                if conn.closed:
+                    return
+        finally:
+            self.disconnect(conn)
+
+    def response(self, conn: DashboardConnection) -> "HubStreamResponse":
+        return HubStreamResponse(self, conn)
+
+    async def stop(self) -> None:
+        """Evict everything (clients reconnect elsewhere) and stop the wheel."""
+        for conn in list(self._connections):
+            self.evict(conn, "shutdown")
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def metrics(self) -> dict:
+        buffered = [conn.buffered_bytes for conn in self._connections]
+        return {
+            "connections": len(self._connections),
+            "users": len(self._by_user),
+            "opened": self.opened,
+            "heartbeats": self.heartbeats,
+            "evictions": dict(self.evictions),
+            "buffered_bytes": sum(buffered),
+            "max_buffered_bytes": max(buffered, default=0),
+            "heartbeat_tick": self.tick_latency.summary(),
+        }
+
+
+class HubStreamResponse(StreamingResponse):
+    """
+    Minimal ASGI response for a hub stream.
+
+    StreamingResponse runs an anyio task group with two tasks per stream
+    on ASGI < 2.4 servers (uvicorn's h11 protocol); this keeps its
+    constructor and headers but uses one disconnect watcher and sends
+    from the request task itself.
+    """
+
+    def __init__(self, hub: DashboardEventHub, conn: DashboardConnection):
+        super().__init__(
+            hub.stream(conn),
+            media_type="text/event-stream",
+            headers={"cache-control": "no-cache", "x-accel-buffering": "no"},
+        )
+        self.hub = hub
+        self.conn = conn
+
+    async def _watch_disconnect(self, receive) -> None:
+        while (await receive())["type"] != "http.disconnect":
+            pass
+        self.hub.disconnect(self.conn)
+
+    async def __call__(self, scope, receive, send) -> None:
+        watcher = asyncio.create_task(self._watch_disconnect(receive))
+        try:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            async for payload in self.body_iterator:
+                await send({"type": "http.response.body", "body": payload.encode(), "more_body": True})
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        except OSError:
+            pass  # Client went away mid-send
+        finally:
+            watcher.cancel()
+            self.hub.disconnect(self.conn)
+
+
+dashboard_hub = DashboardEventHub(
+    heartbeat_interval=float(os.getenv("DASHBOARD_HEARTBEAT_SECONDS", "30")),
+    max_connections=int(os.getenv("DASHBOARD_MAX_CONNECTIONS", "20000")),
+    max_per_user=int(os.getenv("DASHBOARD_MAX_CONNECTIONS_PER_USER", "8")),
+    idle_timeout=float(os.getenv("DASHBOARD_IDLE_TIMEOUT_SECONDS", "1800")),
+)
+register_metrics("dashboard_events", dashboard_hub.metrics)
@@ -38,6 +38,9 @@ def get_model(provider: str = "anthropic", model: str = "claude-sonnet-4") -> st
 
 # Model presets for different use cases
 MODELS = {
+    # Cheapest tier for small talk (picked per turn by agents/turn_router.py)
+    "fast": get_model("google", "gemini-2.0-flash-lite"),
+
     # Fast responses for user-facing chat
     "talker": get_model("google", "gemini-2.0-flash"),
 
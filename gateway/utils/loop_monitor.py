@@ -0,0 +1,145 @@
+"""
+Event-loop lag monitor and blocking-call detector
+
+One synchronous call in a tool or SSE generator stalls every concurrent
+voice stream on the worker. This watchdog finds those stalls in
+production without a profiler:
+
+- A loop task sleeps for `interval` and records how late it wakes up
+  (event-loop lag) into a rolling window.
+- A watchdog thread notices when the loop hasn't ticked for longer than
+  `threshold` and captures the loop thread's stack while it is still
+  blocked, which points at the offending call.
+
+Opt-in via LOOP_MONITOR_ENABLED=1; results appear under "event_loop" on
+GET /health/metrics.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from typing import Deque, Optional
+
+import logfire
+
+from .metrics import LatencyWindow, register_metrics
+
+
+class LoopMonitor:
+    """Measures event-loop lag and records stacks of blocking calls."""
+
+    def __init__(
+        self,
+        interval: float = 0.1,
+        threshold: float = 0.25,
+        max_stalls: int = 20,
+    ):
+        self.interval = interval
+        self.threshold = threshold
+        self.lag = LatencyWindow()
+        self.stalls: Deque[dict] = deque(maxlen=max_stalls)
+        self.stall_count = 0
+
+        self._last_tick = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._current_stall: Optional[dict] = None
+
+    def start(self) -> None:
+        """Start monitoring the running loop. Call from inside the loop."""
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._measure())
+        self._thread = threading.Thread(
+            target=self._watch, name="loop-monitor", daemon=True
+        )
+        self._thread.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._thread:
+            self._thread.join(timeout=1)
+
+    async def _measure(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - start - self.interval)
+            self.lag.add(lag)
+            self._last_tick = time.monotonic()
+
+            stall = self._current_stall
+            if stall is not None:
+                # The loop is running again: record how long it was really blocked
+                stall["blocked_ms"] = round(lag * 1000, 1)
+                self._current_stall = None
+                if os.getenv("LOGFIRE_TOKEN"):
+                    logfire.warn(
+                        "Event loop blocked for {blocked_ms}ms",
+                        blocked_ms=stall["blocked_ms"],
+                        stack=stall["stack"],
+                    )
+
+    def _watch(self) -> None:
+        poll = min(self.interval, self.threshold) / 2
+        while not self._stopped.wait(poll):
+            silent_for = time.monotonic() - self._last_tick
+            if silent_for < self.interval + self.threshold or self._current_stall:
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stall = {
+                "detected_at": datetime.utcnow().isoformat(),
+                "blocked_ms": round(silent_for * 1000, 1),  # Updated once the loop recovers
+                "stack": "".join(traceback.format_stack(frame)),
+            }
+            self.stalls.append(stall)
+            self.stall_count += 1
+            self._current_stall = stall
+
+    def metrics(self) -> dict:
+        return {
+            "lag": self.lag.summary(),
+            "threshold_ms": round(self.threshold * 1000),
+            "stall_count": self.stall_count,
+            "recent_stalls": list(self.stalls),
+        }
+
+
+loop_monitor: Optional[LoopMonitor] = None
+
+
+def start_loop_monitor() -> Optional[LoopMonitor]:
+    """Start the watchdog if LOOP_MONITOR_ENABLED is set; no-op otherwise."""
+    global loop_monitor
+    if os.getenv("LOOP_MONITOR_ENABLED", "").lower() not in ("1", "true", "yes"):
+        return None
+
+    loop_monitor = LoopMonitor(
+        interval=float(os.getenv("LOOP_MONITOR_INTERVAL_MS", "100")) / 1000,
+        threshold=float(os.getenv("LOOP_MONITOR_THRESHOLD_MS", "250")) / 1000,
+    )
+    loop_monitor.start()
+    register_metrics("event_loop", loop_monitor.metrics)
+    return loop_monitor
+
+
+async def stop_loop_monitor() -> None:
+    if loop_monitor is not None:
+        await loop_monitor.stop()
@@ -0,0 +1,58 @@
+"""
+In-process metrics surface
+
+Components register a provider (a zero-arg callable returning a dict)
+under a name; GET /health/metrics returns every provider's snapshot.
+Metrics are per worker process.
+"""
+
+from collections import deque
+from typing import Callable, Deque, Dict
+
+
+_providers: Dict[str, Callable[[], dict]] = {}
+
+
+def register_metrics(name: str, provider: Callable[[], dict]) -> None:
+    """Expose `provider()` under `name` on the metrics endpoint."""
+    _providers[name] = provider
+
+
+def collect_metrics() -> dict:
+    """Snapshot of every registered provider."""
+    snapshot = {}
+    for name, provider in _providers.items():
+        try:
+            snapshot[name] = provider()
+        except Exception as e:
+            snapshot[name] = {"error": str(e)}
+    return snapshot
+
+
+class LatencyWindow:
+    """Rolling window of samples (seconds) with percentile summaries."""
+
+    def __init__(self, size: int = 1024):
+        self._samples: Deque[float] = deque(maxlen=size)
+        self.count = 0
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self.count += 1
+
+    def percentile(self, pct: float) -> float:
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def summary(self) -> dict:
+        """p50/p95/p99/max in milliseconds plus the total sample count."""
+        return {
+            "count": self.count,
+            "p50_ms": round(self.percentile(50) * 1000, 2),
+            "p95_ms": round(self.percentile(95) * 1000, 2),
+            "p99_ms": round(self.percentile(99) * 1000, 2),
+            "max_ms": round(max(self._samples, default=0.0) * 1000, 2),
+        }
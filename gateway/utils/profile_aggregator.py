@@ -0,0 +1,195 @@
+"""
+Live profile aggregation for the dashboard
+
+Fans out to Neon (facts), Zep (entities) and SuperMemory (memories)
+concurrently under a single deadline. Slow or failing sources don't
+block the response: whatever arrived in time is returned together with
+a per-source status.
+
+Results are kept as a short-lived per-user snapshot in shared state
+(utils/shared_state.py), so every worker serves the same snapshot and an
+invalidation on one worker is seen by all. The aggregator listens for
+fact events on the dashboard hub (utils/event_hub.py) and invalidates the
+user's snapshot on each; REST fact edits call `invalidate(user_id)`
+directly. The snapshot ETag lets unchanged dashboards short-circuit with 304.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from .event_hub import dashboard_hub
+from .shared_state import SharedState, shared_state
+
+# Hub events that mean a user's facts changed
+FACT_EVENTS = ("fact_extracted", "fact_updated")
+
+
+class LiveProfile(BaseModel):
+    """Aggregated dashboard profile with per-source status."""
+
+    profile: Dict[str, list] = {}
+    entities: list = []
+    memories: list = []
+    sources: Dict[str, str] = {}  # source -> "ok" | "timeout" | "error" | "unavailable"
+    last_updated: str
+    etag: str = ""
+
+    @property
+    def complete(self) -> bool:
+        """True when no source timed out or failed (unconfigured ones are fine)."""
+        return all(status in ("ok", "unavailable") for status in self.sources.values())
+
+
+def _compute_etag(payload: dict) -> str:
+    raw = json.dumps(payload, sort_keys=True, default=str)
+    return '"' + hashlib.sha256(raw.encode()).hexdigest()[:32] + '"'
+
+
+class ProfileAggregator:
+    """Concurrent Neon + Zep + SuperMemory fan-out with a per-user snapshot."""
+
+    def __init__(
+        self,
+        neon_service: Optional[Any] = None,
+        zep_client: Optional[Any] = None,
+        supermemory_client: Optional[Any] = None,
+        deadline: float = 1.5,
+        ttl: float = 10.0,
+        state: Optional[SharedState] = None,
+    ):
+        # Service references (injected at runtime)
+        self.neon_service = neon_service
+        self.zep_client = zep_client
+        self.supermemory_client = supermemory_client
+        self.deadline = deadline
+        self.ttl = ttl
+        self.state = state or shared_state
+        # Per user with an aggregation in flight on this worker: [generation, readers].
+        # Entries leave with their last reader, so this stays as small as the load.
+        self._inflight: Dict[str, List[int]] = {}
+
+    @staticmethod
+    def _key(user_id: str) -> str:
+        return f"profile:{user_id}"
+
+    def _bump(self, user_id: str) -> None:
+        """Mark in-flight aggregations for `user_id` as stale."""
+        entry = self._inflight.get(user_id)
+        if entry is not None:
+            entry[0] += 1
+
+    async def invalidate(self, user_id: str) -> None:
+        """Drop the cached snapshot, e.g. after a fact write."""
+        self._bump(user_id)
+        await self.state.discard(self._key(user_id))
+
+    def on_fact_event(self, user_id: str, data: dict) -> Awaitable[None]:
+        """Hub listener: stale-mark right away, drop the snapshot in a task."""
+        self._bump(user_id)
+        return self.state.discard(self._key(user_id))
+
+    async def get(self, user_id: str) -> LiveProfile:
+        """Return the cached snapshot if fresh, otherwise aggregate."""
+        cached = await self.state.get_json(self._key(user_id))
+        if cached is not None:
+            return LiveProfile(**cached)
+
+        entry = self._inflight.setdefault(user_id, [0, 0])
+        generation = entry[0]
+        entry[1] += 1
+        try:
+            result = await self.aggregate(user_id)
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._inflight[user_id]
+        # Partial results are served but not cached, so the next poll retries.
+        # Neither is a result that raced with an invalidation.
+        # (The generation check only sees this worker's invalidations.)
+        if result.complete and entry[0] == generation:
+            await self.state.set_json(self._key(user_id), result.model_dump(), self.ttl)
+        return result
+
+    async def aggregate(self, user_id: str) -> LiveProfile:
+        fetchers: Dict[str, Optional[Callable[[str], Awaitable[Any]]]] = {
+            "profile": self._fetch_profile if self.neon_service else None,
+            "entities": self._fetch_entities if self.zep_client else None,
+            "memories": self._fetch_memories if self.supermemory_client else None,
+        }
+
+        sources = {name: "unavailable" for name, fetch in fetchers.items() if fetch is None}
+        tasks = {
+            asyncio.create_task(fetch(user_id)): name
+            for name, fetch in fetchers.items()
+            if fetch is not None
+        }
+
+        data: Dict[str, Any] = {}
+        if tasks:
+            done, pending = await asyncio.wait(tasks, timeout=self.deadline)
+            for task in pending:
+                task.cancel()
+                sources[tasks[task]] = "timeout"
+            for task in done:
+                name = tasks[task]
+                if task.exception() is not None:
+                    sources[name] = "error"
+                else:
+                    sources[name] = "ok"
+                    data[name] = task.result()
+
+        payload = {
+            "profile": data.get("profile", {}),
+            "entities": data.get("entities", []),
+            "memories": data.get("memories", []),
+            "sources": sources,
+        }
+        return LiveProfile(
+            **payload,
+            last_updated=datetime.utcnow().isoformat(),
+            etag=_compute_etag(payload),
+        )
+
+    async def _fetch_profile(self, user_id: str) -> Dict[str, list]:
+        facts = await self.neon_service.get_facts(user_id)
+
+        by_type: Dict[str, list] = {}
+        for f in facts or []:
+            by_type.setdefault(f.fact_type, []).append(f.fact_value)
+        return by_type
+
+    async def _fetch_entities(self, user_id: str) -> list:
+        results = await self.zep_client.graph.search(
+            user_id=user_id,
+            query="user profile and relocation preferences",
+            limit=20,
+        )
+        return [
+            {"name": getattr(r, "name", None), "content": getattr(r, "content", None)}
+            for r in results or []
+        ]
+
+    async def _fetch_memories(self, user_id: str) -> list:
+        context = await self.supermemory_client.get_personalized_context(
+            user_id=user_id,
+            query="relocation preferences",
+        )
+        if not context:
+            return []
+        return context if isinstance(context, list) else [context]
+
+
+# Shared instance used by the dashboard and invalidated by fact writes
+profile_aggregator = ProfileAggregator(
+    deadline=float(os.getenv("PROFILE_AGGREGATE_DEADLINE_SECONDS", "1.5")),
+    ttl=float(os.getenv("PROFILE_SNAPSHOT_TTL_SECONDS", "10")),
+)
+# Fact events from any publisher invalidate the snapshot, not just tools.py
+for _event in FACT_EVENTS:
+    dashboard_hub.subscribe(_event, profile_aggregator.on_fact_event)
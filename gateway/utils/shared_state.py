@@ -0,0 +1,326 @@
+"""
+Shared state for caches across uvicorn workers
+
+With several workers per host, in-process caches are duplicated per
+worker and hit rates drop by the worker count. Gateway caches target
+the `SharedState` interface instead, backed by one of:
+
+- local: in-process dict (default; single worker, tests)
+- mmap: same-host shared-memory hash table in a file under /dev/shm,
+  for hot read-mostly data. Fixed-size slots; entries that don't fit a
+  slot are simply not cached.
+- redis: minimal RESP client for Redis or any Redis-protocol server
+  (KeyDB, Dragonfly, a local stand-in), shared across hosts.
+
+Selected with SHARED_STATE_BACKEND (+ SHARED_STATE_URL or
+SHARED_STATE_MMAP_PATH). All backends are caches: a miss or a backend
+error is never fatal to a request.
+"""
+
+import asyncio
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from .metrics import register_metrics
+
+
+class SharedState:
+    """Async key/value cache with per-key TTL. Values are bytes."""
+
+    name = "base"
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    async def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    async def get_json(self, key: str) -> Optional[Any]:
+        try:
+            raw = await self.get(key)
+        except Exception:
+            self.errors += 1
+            raw = None
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    async def set_json(self, key: str, value: Any, ttl: float) -> None:
+        try:
+            await self.set(key, json.dumps(value, default=str).encode(), ttl)
+        except Exception:
+            self.errors += 1
+
+    async def discard(self, key: str) -> None:
+        """delete() that never raises (for invalidation paths)."""
+        try:
+            await self.delete(key)
+        except Exception:
+            self.errors += 1
+
+    def metrics(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "errors": self.errors,
+        }
+
+
+class LocalState(SharedState):
+    """Per-process dict; what every cache used before (one copy per worker)."""
+
+    name = "local"
+
+    def __init__(self, max_entries: int = 10_000):
+        super().__init__()
+        self.max_entries = max_entries
+        self._data: Dict[str, Tuple[float, bytes]] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.time():
+            del self._data[key]
+            return None
+        return entry[1]
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        if len(self._data) >= self.max_entries and key not in self._data:
+            self._data.pop(next(iter(self._data)))  # Oldest insert
+        self._data[key] = (time.time() + ttl, value)
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+
+class MmapState(SharedState):
+    """
+    Same-host shared hash table in a memory-mapped file.
+
+    Layout: `slots` fixed-size slots, each
+        [used:1][expires_at:8][key_hash:16][value_len:4][value...]
+    Keys are addressed by their 128-bit hash with linear probing over
+    `probes` slots. Readers take a shared flock, writers an exclusive
+    one, so every worker on the host sees the same entries. Locking and
+    copying run in a worker thread so contention never blocks the loop.
+    """
+
+    name = "mmap"
+    _HEADER = struct.Struct("<Bd16sI")
+
+    def __init__(self, path: str, slots: int = 2048, slot_size: int = 16384, probes: int = 8):
+        super().__init__()
+        self.slots = slots
+        self.slot_size = slot_size
+        self.probes = probes
+        self.max_value = slot_size - self._HEADER.size
+
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        size = slots * slot_size
+        if os.fstat(self._fd).st_size < size:
+            os.ftruncate(self._fd, size)
+        self._map = mmap.mmap(self._fd, size)
+        # flock is per open file, so threads of this process also need a local lock
+        self._thread_lock = threading.Lock()
+
+    def _locate(self, key: str) -> Tuple[bytes, List[int]]:
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little") % self.slots
+        return digest, [(first + i) % self.slots for i in range(self.probes)]
+
+    def _read_header(self, slot: int) -> Tuple[int, float, bytes, int]:
+        return self._HEADER.unpack_from(self._map, slot * self.slot_size)
+
+    @contextmanager
+    def _locked(self, mode: int):
+        with self._thread_lock:
+            fcntl.flock(self._fd, mode)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await asyncio.to_thread(self._set, key, value, ttl)
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self._delete, key)
+
+    def _get(self, key: str) -> Optional[bytes]:
+        digest, candidates = self._locate(key)
+        with self._locked(fcntl.LOCK_SH):
+            for slot in candidates:
+                used, expires_at, slot_hash, length = self._read_header(slot)
+                if used and slot_hash == digest:
+                    if expires_at < time.time():
+                        return None
+                    start = slot * self.slot_size + self._HEADER.size
+                    return bytes(self._map[start:start + length])
+            return None
+
+    def _set(self, key: str, value: bytes, ttl: float) -> None:
+        if len(value) > self.max_value:
+            return  # Too big for a slot: leave uncached
+        digest, candidates = self._locate(key)
+        now = time.time()
+        with self._locked(fcntl.LOCK_EX):
+            target = None
+            for slot in candidates:
+                used, expires_at, slot_hash, _ = self._read_header(slot)
+                if used and slot_hash == digest:
+                    target = slot
+                    break
+                if target is None and (not used or expires_at < now):
+                    target = slot
+            if target is None:
+                target = candidates[0]  # Table is hot here: evict the home slot
+
+            offset = target * self.slot_size
+            self._HEADER.pack_into(self._map, offset, 1, now + ttl, digest, len(value))
+            start = offset + self._HEADER.size
+            self._map[start:start + len(value)] = value
+
+    def _delete(self, key: str) -> None:
+        digest, candidates = self._locate(key)
+        with self._locked(fcntl.LOCK_EX):
+            for slot in candidates:
+                used, _, slot_hash, _ = self._read_header(slot)
+                if used and slot_hash == digest:
+                    self._HEADER.pack_into(self._map, slot * self.slot_size, 0, 0.0, b"\0" * 16, 0)
+
+
+class RedisState(SharedState):
+    """Minimal RESP2 client (GET / SET PX / DEL) over a small connection pool."""
+
+    name = "redis"
+
+    def __init__(self, url: str, pool_size: int = 4, timeout: float = 0.25):
+        super().__init__()
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._pool: asyncio.Queue = asyncio.Queue()
+        self._pool_size = pool_size
+        self._opened = 0
+
+    async def _connect(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        conn = (reader, writer)
+        if self.password:
+            await self._roundtrip(conn, "AUTH", self.password)
+        if self.db:
+            await self._roundtrip(conn, "SELECT", str(self.db))
+        return conn
+
+    @staticmethod
+    def _encode(*parts: Any) -> bytes:
+        out = [b"*%d\r\n" % len(parts)]
+        for part in parts:
+            data = part if isinstance(part, bytes) else str(part).encode()
+            out.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(out)
+
+    @staticmethod
+    async def _read_reply(reader: asyncio.StreamReader) -> Any:
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode()
+        if kind == b"-":
+            raise RuntimeError(rest.decode())
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            if length < 0:
+                return None
+            data = await reader.readexactly(length + 2)
+            return data[:-2]
+        raise RuntimeError(f"Unsupported RESP reply: {line!r}")
+
+    async def _roundtrip(self, conn, *parts: Any) -> Any:
+        reader, writer = conn
+        writer.write(self._encode(*parts))
+        await writer.drain()
+        return await self._read_reply(reader)
+
+    async def _command(self, *parts: Any) -> Any:
+        try:
+            conn = self._pool.get_nowait()
+        except asyncio.QueueEmpty:
+            if self._opened < self._pool_size:
+                self._opened += 1
+                try:
+                    conn = await asyncio.wait_for(self._connect(), self.timeout)
+                except BaseException:  # Including the caller being cancelled
+                    self._opened -= 1
+                    raise
+            else:
+                conn = await asyncio.wait_for(self._pool.get(), self.timeout)
+
+        try:
+            reply = await asyncio.wait_for(self._roundtrip(conn, *parts), self.timeout)
+        except BaseException:
+            # Connection state is unknown after a failure or cancellation: drop it
+            conn[1].close()
+            self._opened -= 1
+            raise
+        self._pool.put_nowait(conn)
+        return reply
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._command("GET", key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self._command("SET", key, value, "PX", max(1, int(ttl * 1000)))
+
+    async def delete(self, key: str) -> None:
+        await self._command("DEL", key)
+
+
+def create_shared_state() -> SharedState:
+    backend = os.getenv("SHARED_STATE_BACKEND", "local")
+    if backend == "redis":
+        return RedisState(os.getenv("SHARED_STATE_URL", "redis://localhost:6379/0"))
+    if backend == "mmap":
+        return MmapState(
+            os.getenv("SHARED_STATE_MMAP_PATH", "/dev/shm/quest-gateway.cache"),
+            slots=int(os.getenv("SHARED_STATE_MMAP_SLOTS", "2048")),
+            slot_size=int(os.getenv("SHARED_STATE_MMAP_SLOT_BYTES", "16384")),
+        )
+    return LocalState()
+
+
+shared_state = create_shared_state()
+register_metrics("shared_state", shared_state.metrics)
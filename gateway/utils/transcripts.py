@@ -0,0 +1,216 @@
+"""
+Write-behind transcript persistence
+
+Chat and voice routers capture each finished turn (user message plus the
+streamed assistant reply) into a bounded in-memory buffer. A background
+worker flushes the buffer to Neon in batches, on whichever comes first:
+`batch_size` pending messages or `flush_interval` seconds. The request
+path never waits on the database.
+
+Messages are appended to users.transcripts (jsonb array, same shape the
+Next.js /api/user/transcripts/save route writes) with one multi-row
+UPDATE ... FROM (VALUES ...) per batch. lifespan flushes on shutdown,
+within `drain_timeout` so an unreachable database can't hang it.
+"""
+
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, List, Literal, Optional
+from uuid import uuid4
+
+import psycopg
+from pydantic import BaseModel
+
+from .metrics import LatencyWindow, register_metrics
+
+
+class TranscriptMessage(BaseModel):
+    """One transcript entry, matching the frontend's transcript shape."""
+
+    id: str
+    role: Literal["user", "assistant"]
+    content: str
+    timestamp: str
+    source: Literal["voice", "chat"]
+
+
+class TranscriptWriter:
+    """Bounded write-behind buffer with a batching flush worker."""
+
+    def __init__(
+        self,
+        dsn: Optional[str],
+        max_buffer: int = 10_000,
+        batch_size: int = 200,
+        flush_interval: float = 2.0,
+        connect_timeout: int = 5,
+        drain_timeout: float = 10.0,
+    ):
+        self.dsn = dsn
+        self.connect_timeout = connect_timeout
+        self.drain_timeout = drain_timeout
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer: Deque[tuple[str, TranscriptMessage]] = deque(maxlen=max_buffer)
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._conn: Optional[psycopg.AsyncConnection] = None
+
+        self.captured = 0
+        self.flushed = 0
+        self.batches = 0
+        self.dropped = 0
+        self.failures = 0
+        self.flush_latency = LatencyWindow()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.dsn)
+
+    def capture_turn(
+        self,
+        user_id: Optional[str],
+        user_message: str,
+        assistant_text: str,
+        source: Literal["voice", "chat"],
+    ) -> None:
+        """Queue a finished turn. Never blocks; drops the oldest entries when full."""
+        if not self.enabled or not user_id:
+            return
+
+        now = datetime.utcnow().isoformat()
+        for role, content in (("user", user_message), ("assistant", assistant_text)):
+            if not content:
+                continue
+            if len(self._buffer) == self._buffer.maxlen:
+                self.dropped += 1
+            self._buffer.append((user_id, TranscriptMessage(
+                id=str(uuid4()), role=role, content=content, timestamp=now, source=source,
+            )))
+            self.captured += 1
+
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    async def start(self) -> None:
+        if self.enabled and self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the worker and flush everything still buffered, within drain_timeout."""
+        try:
+            await asyncio.wait_for(self._drain(), timeout=self.drain_timeout)
+        except asyncio.TimeoutError:
+            print(f"⚠️  Transcript drain timed out; {len(self._buffer)} messages not persisted")
+        finally:
+            self._task = None
+            if self._conn is not None:
+                await self._conn.close()
+                self._conn = None
+
+    async def _drain(self) -> None:
+        if self._task is not None:
+            # Let an in-progress flush finish rather than cancelling it mid-write
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+        while self._buffer:
+            if not await self.flush():
+                break
+
+    async def _wait(self) -> None:
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            await self._wait()
+            while self._buffer and not self._stopping:
+                if not await self.flush():
+                    await self._wait()  # Back off; entries were re-queued
+                    break
+                if len(self._buffer) < self.batch_size:
+                    break
+
+    async def flush(self) -> bool:
+        """Write up to one batch. Returns False (and re-queues) on database errors."""
+        batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+        if not batch:
+            return True
+
+        by_user: Dict[str, List[dict]] = {}
+        for user_id, message in batch:
+            by_user.setdefault(user_id, []).append(message.model_dump())
+
+        placeholders = ", ".join(["(%s, %s::jsonb)"] * len(by_user))
+        params: List[str] = []
+        for user_id, messages in by_user.items():
+            params += [user_id, json.dumps(messages)]
+
+        start = time.perf_counter()
+        try:
+            if self._conn is None or self._conn.closed:
+                self._conn = await psycopg.AsyncConnection.connect(
+                    self.dsn, autocommit=True, connect_timeout=self.connect_timeout,
+                )
+            await self._conn.execute(
+                f"""
+                UPDATE users AS u
+                SET transcripts = COALESCE(u.transcripts, '[]'::jsonb) || v.messages,
+                    updated_at = NOW()
+                FROM (VALUES {placeholders}) AS v(neon_auth_id, messages)
+                WHERE u.neon_auth_id = v.neon_auth_id
+                """,
+                params,
+            )
+        except BaseException as e:
+            # Put the batch back in order; anything beyond the bound is dropped oldest-first.
+            # Also on cancellation, so a flush interrupted at shutdown loses nothing.
+            for item in reversed(batch):
+                if len(self._buffer) == self._buffer.maxlen:
+                    self.dropped += 1
+                    continue
+                self._buffer.appendleft(item)
+            if not isinstance(e, Exception):
+                raise
+            self.failures += 1
+            print(f"⚠️  Transcript flush failed ({len(batch)} messages re-queued): {e}")
+            if self._conn is not None and self._conn.broken:
+                self._conn = None
+            return False
+
+        self.flush_latency.add(time.perf_counter() - start)
+        self.flushed += len(batch)
+        self.batches += 1
+        return True
+
+    def metrics(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "buffered": len(self._buffer),
+            "captured": self.captured,
+            "flushed": self.flushed,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "failures": self.failures,
+            "flush_latency": self.flush_latency.summary(),
+        }
+
+
+transcript_writer = TranscriptWriter(
+    dsn=os.getenv("DATABASE_URL"),
+    max_buffer=int(os.getenv("TRANSCRIPT_BUFFER_MAX", "10000")),
+    batch_size=int(os.getenv("TRANSCRIPT_BATCH_SIZE", "200")),
+    flush_interval=float(os.getenv("TRANSCRIPT_FLUSH_SECONDS", "2")),
+    drain_timeout=float(os.getenv("TRANSCRIPT_DRAIN_SECONDS", "10")),
+)
+register_metrics("transcripts", transcript_writer.metrics)